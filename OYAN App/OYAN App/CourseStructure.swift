@@ -110,7 +110,9 @@ struct GeneratedLessonContent: Codable {
     }
 
     /// Real lesson content for each cloud when API is unavailable. Pass english: true for English, false for Russian.
+    /// Prefers GeneratedLessons.oylb when it ships with the app (see GeneratedLessonBundle).
     static func bundled(for cloudIndex: Int, english: Bool = true) -> GeneratedLessonContent {
+        if let lesson = GeneratedLessonBundle.shared?.lesson(for: cloudIndex, english: english) { return lesson }
         if english { return bundledEnglish(for: cloudIndex) }
         return bundledRussian(for: cloudIndex)
     }
@@ -211,8 +213,8 @@ struct GeneratedLessonContent: Codable {
                     GeneratedQuizItem(question: "Choose the informal farewell.", options: ["Сау бол", "Сау болыңыз", "Сәлеметсіз бе", "Сәлем"], correctIndex: 0, points: 1),
                     GeneratedQuizItem(question: "Which farewell do you use with a teacher?", options: ["Сау бол", "Сәлем", "Сау болыңыз", "None of the above"], correctIndex: 2, points: 1),
                     GeneratedQuizItem(question: "Translate: Hello! (informal)", options: ["Сәлем!", "Сау бол!", "Сәлеметсіз бе!", "Сау болыңыз!"], correctIndex: 0, points: 1),
-                    GeneratedQuizItem(question: "What does Сау бол mean?", options: ["Goodbye! (informal)", "Student", "Teacher", "Hello"], correctIndex: 0, points: 2, type: "multiple_choice"),
-                    GeneratedQuizItem(question: "What does Сәлеметсіз бе mean?", options: ["Hello! (formal)", "Student", "Teacher", "Hello"], correctIndex: 0, points: 2, type: "multiple_choice")
+                    GeneratedQuizItem(question: "What does Сау бол mean?", options: ["Goodbye! (informal)", "Hi!", "Hello! (formal)", "Hi, Aliya!"], correctIndex: 0, points: 2, type: "multiple_choice"),
+                    GeneratedQuizItem(question: "What does Сәлеметсіз бе mean?", options: ["Hello! (formal)", "Hi!", "Goodbye! (informal)", "Hi, Aliya!"], correctIndex: 0, points: 2, type: "multiple_choice")
                 ]
             )
         case 6:
@@ -229,7 +231,7 @@ struct GeneratedLessonContent: Codable {
                     GeneratedQuizItem(question: "Сыныптасы is...", options: ["Classmate", "Teacher", "Principal"], correctIndex: 0, points: 1, type: "mcq"),
                     GeneratedQuizItem(question: "How do you greet a teacher?", options: ["Сәлеметсіз бе", "Сәлем", "Сау бол"], correctIndex: 0, points: 1, type: "mcq"),
                     GeneratedQuizItem(question: "How do you greet a classmate?", options: ["Сәлем", "Сәлеметсіз бе", "Көріскенше"], correctIndex: 0, points: 1, type: "mcq"),
-                    GeneratedQuizItem(question: "What does Мұғалім mean?", options: ["Teacher", "Classmate", "Student", "Hello"], correctIndex: 0, points: 2, type: "multiple_choice"),
+                    GeneratedQuizItem(question: "What does Мұғалім mean?", options: ["Teacher", "Classmate", "Student", "Friend"], correctIndex: 0, points: 2, type: "multiple_choice"),
                     GeneratedQuizItem(question: "Choose the correct translation: Teacher", options: ["Мұғалім", "Оқушы", "Дос"], correctIndex: 0, points: 1, type: "mcq"),
                     GeneratedQuizItem(question: "Choose the correct translation: Classmate", options: ["Сыныптасы", "Мұғалім", "Директор"], correctIndex: 0, points: 1, type: "mcq"),
                     GeneratedQuizItem(question: "Fill in the blank: Hello (to a teacher) =  _______ бе", options: ["Сәлеметсіз", "Сәлем", "Рақмет"], correctIndex: 0, points: 1, type: "mcq"),
@@ -248,13 +250,13 @@ struct GeneratedLessonContent: Codable {
                 quiz: [
                     GeneratedQuizItem(question: "How would you greet your teacher in the morning?", options: ["Сәлем!", "Сау бол!", "Көріскенше!", "Сәлеметсіз бе!"], correctIndex: 3, points: 1, type: "multiple_choice"),
                     GeneratedQuizItem(question: "Which greeting is informal?", options: ["Сәлеметсіз бе?", "Сәлем!", "Рақмет!", "Көріскенше!"], correctIndex: 1, points: 1, type: "multiple_choice"),
-                    GeneratedQuizItem(question: "Complete the sentence: _____, достар! (Hi, friends!)", options: ["Сәлем", "Сау бол!", "Көріскенше!"], correctIndex: 0, points: 1, type: "fill_in_the_blank"),
-                    GeneratedQuizItem(question: "What does Мұғалім mean?", options: ["Teacher", "Student", "Hello", "Goodbye"], correctIndex: 0, points: 3, type: "multiple_choice"),
+                    GeneratedQuizItem(question: "Complete the sentence: _____, достар! (Hi, friends!)", options: ["Сәлем", "Сәлеметсіз бе?", "Сау бол!", "Сау болыңыз!"], correctIndex: 0, points: 1, type: "fill_in_the_blank"),
+                    GeneratedQuizItem(question: "What does Мұғалім mean?", options: ["Teacher", "Classmate", "Goodbye", "Hello!"], correctIndex: 0, points: 3, type: "multiple_choice"),
                     GeneratedQuizItem(question: "What does 'Көріскенше!' mean?", options: ["Hello!", "Goodbye!", "See you later!", "Thank you!"], correctIndex: 2, points: 1, type: "multiple_choice"),
                     GeneratedQuizItem(question: "Choose the correct greeting you hear.", options: ["Сәлем!", "Сәлеметсіз бе?", "Сау бол!", "Рақмет!"], correctIndex: 1, points: 1, type: "listening", audioText: "Сәлеметсіз бе?"),
                     GeneratedQuizItem(question: "'Сәлем' is a formal greeting.", options: ["Yes", "No"], correctIndex: 1, points: 1, type: "true_false"),
-                    GeneratedQuizItem(question: "Complete the sentence: Сәлеметсіз _____, ағай? (Good morning/afternoon/evening, sir?)", options: ["бе", "Сәлем!", "Сау бол!", "Көріскенше!"], correctIndex: 0, points: 1, type: "fill_in_the_blank"),
-                    GeneratedQuizItem(question: "What does Сәлем mean?", options: ["Hi", "Student", "Teacher", "Hello"], correctIndex: 0, points: 2, type: "multiple_choice"),
+                    GeneratedQuizItem(question: "Complete the sentence: Сәлеметсіз _____, ағай? (Good morning/afternoon/evening, sir?)", options: ["бе", "Мұғалім", "Сыныптасы", "Сәлем!"], correctIndex: 0, points: 1, type: "fill_in_the_blank"),
+                    GeneratedQuizItem(question: "What does Сәлем mean?", options: ["Hi", "Goodbye", "Hello! (formal)", "Hi, Aliya!"], correctIndex: 0, points: 2, type: "multiple_choice"),
                     GeneratedQuizItem(question: "You are leaving school for the day. What do you say to your classmate?", options: ["Сәлеметсіз бе?", "Рақмет!", "Сау бол!", "Көріскенше!"], correctIndex: 2, points: 1, type: "multiple_choice"),
                     GeneratedQuizItem(question: "Which word means 'teacher'?", options: ["Дос", "Мұғалім", "Сынып", "Оқушы"], correctIndex: 1, points: 1, type: "multiple_choice")
                 ]
@@ -269,15 +271,15 @@ struct GeneratedLessonContent: Codable {
                 ],
                 examples: ["Мен — I", "Сен — You (informal, singular)", "Оқушы — Student", "Мен оқушымын — I am a student", "Сен оқушысың — You are a student (informal)", "Ол оқушы — He/She is a student", "Мен мұғаліммін — I am a teacher (from Unit 2)", "Сен мұғалімсің — You are a teacher (informal)"],
                 quiz: [
-                    GeneratedQuizItem(question: "Translate to Kazakh: I", options: ["Мен", "Оқушы", "Сен оқушысың", "Мұғалім"], correctIndex: 0, points: 1, type: "translate_to_kazakh"),
-                    GeneratedQuizItem(question: "What does Сен mean?", options: ["You (informal)", "I am a student", "He/She is a student", "I"], correctIndex: 0, points: 1, type: "translate_to_english"),
-                    GeneratedQuizItem(question: "Translate to Kazakh: Student", options: ["Оқушы", "Мен", "Сен оқушысың", "Мұғалім"], correctIndex: 0, points: 1, type: "translate_to_kazakh"),
-                    GeneratedQuizItem(question: "What does Мен оқушымын mean?", options: ["I am a student", "You (informal)", "He/She is a student", "I"], correctIndex: 0, points: 2, type: "translate_to_english"),
-                    GeneratedQuizItem(question: "Translate to Kazakh: You are a student (informal)", options: ["Сен оқушысың", "Мен", "Оқушы", "Мұғалім"], correctIndex: 0, points: 2, type: "translate_to_kazakh"),
-                    GeneratedQuizItem(question: "What does Ол оқушы mean?", options: ["He/She is a student", "You (informal)", "I am a student", "I"], correctIndex: 0, points: 2, type: "translate_to_english"),
+                    GeneratedQuizItem(question: "Translate to Kazakh: I", options: ["Мен", "Сен", "Оқушы", "Сен оқушысың"], correctIndex: 0, points: 1, type: "translate_to_kazakh"),
+                    GeneratedQuizItem(question: "What does Сен mean?", options: ["You (informal)", "I", "I am a student", "He/She is a student"], correctIndex: 0, points: 1, type: "translate_to_english"),
+                    GeneratedQuizItem(question: "Translate to Kazakh: Student", options: ["Оқушы", "Мұғалім", "Сыныптасы", "Мен"], correctIndex: 0, points: 1, type: "translate_to_kazakh"),
+                    GeneratedQuizItem(question: "What does Мен оқушымын mean?", options: ["I am a student", "You are a student (informal)", "He/She is a student", "I am a teacher"], correctIndex: 0, points: 2, type: "translate_to_english"),
+                    GeneratedQuizItem(question: "Translate to Kazakh: You are a student (informal)", options: ["Сен оқушысың", "Мен оқушымын", "Ол оқушы", "Мен мұғаліммін"], correctIndex: 0, points: 2, type: "translate_to_kazakh"),
+                    GeneratedQuizItem(question: "What does Ол оқушы mean?", options: ["He/She is a student", "I am a student", "You are a student (informal)", "I am a teacher"], correctIndex: 0, points: 2, type: "translate_to_english"),
                     GeneratedQuizItem(question: "Listen and choose the correct word.", options: ["Мұғалім", "Оқушы", "Дәрігер"], correctIndex: 1, points: 2, type: "listening", audioText: "Оқушы"),
-                    GeneratedQuizItem(question: "What does Мен mean?", options: ["I", "You (informal)", "Student", "Teacher"], correctIndex: 0, points: 2, type: "multiple_choice"),
-                    GeneratedQuizItem(question: "Fill in the blank: ____ оқушымын (I am a student)", options: ["Мен", "Оқушы", "Сен оқушысың", "Мұғалім"], correctIndex: 0, points: 1, type: "fill_in_the_blank")
+                    GeneratedQuizItem(question: "What does Мен mean?", options: ["I", "You (informal)", "I am a student", "He/She is a student"], correctIndex: 0, points: 2, type: "multiple_choice"),
+                    GeneratedQuizItem(question: "Fill in the blank: ____ оқушымын (I am a student)", options: ["Мен", "Сен", "Оқушы", "Сен оқушысың"], correctIndex: 0, points: 1, type: "fill_in_the_blank")
                 ]
             )
         case 9:
@@ -298,7 +300,7 @@ struct GeneratedLessonContent: Codable {
                     GeneratedQuizItem(question: "Complete the sentence: Мен қазақ____.", options: ["пын", "мін", "сың", "сің"], correctIndex: 0, type: "multiple_choice"),
                     GeneratedQuizItem(question: "Complete the sentence: Сен әдемі____.", options: ["мін", "пін", "сың", "сің"], correctIndex: 3, type: "multiple_choice"),
                     GeneratedQuizItem(question: "Мен мұғаліммін", options: ["I am a student.", "You are a teacher.", "I am a teacher.", "You are a student."], correctIndex: 2, type: "listening", audioText: "Мен мұғаліммін"),
-                    GeneratedQuizItem(question: "What does Мен дәрігермін mean?", options: ["I am a doctor.", "You are a student.", "Student", "Teacher"], correctIndex: 0, points: 2, type: "multiple_choice")
+                    GeneratedQuizItem(question: "What does Мен дәрігермін mean?", options: ["I am a doctor.", "You are a student.", "I am a student", "He/She is a student"], correctIndex: 0, points: 2, type: "multiple_choice")
                 ]
             )
         case 10:
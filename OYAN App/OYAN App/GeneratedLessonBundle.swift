@@ -0,0 +1,70 @@
+//
+//  GeneratedLessonBundle.swift
+//  OYAN App
+//
+//  Lesson content bundle written by scripts/apply_generated_to_swift.py --output bundle.
+//  Layout: "OYLB" | UInt16 version | UInt32 index length | index JSON | one JSON blob per lesson.
+//  Only the index is read up front; each lesson is decoded on first use.
+//
+
+import Foundation
+
+final class GeneratedLessonBundle {
+    static let resourceName = "GeneratedLessons"
+    static let resourceExtension = "oylb"
+    static let supportedVersion = 1
+
+    /// Bundle shipped with the app, or nil if the resource is absent (falls back to the Swift literals).
+    static let shared: GeneratedLessonBundle? = {
+        guard let url = Bundle.main.url(forResource: resourceName, withExtension: resourceExtension) else { return nil }
+        return try? GeneratedLessonBundle(url: url)
+    }()
+
+    private struct Index: Decodable {
+        let version: Int
+        let encoding: String?
+        let lessons: [String: [String: [Int]]]
+    }
+
+    private let data: Data
+    private let payloadStart: Int
+    private let index: Index
+    private var cache: [String: GeneratedLessonContent] = [:]
+    private let lock = NSLock()
+
+    init(url: URL) throws {
+        data = try Data(contentsOf: url, options: .mappedIfSafe)
+        let headerSize = 10
+        guard data.count >= headerSize, data.prefix(4) == Data("OYLB".utf8) else {
+            throw CocoaError(.fileReadCorruptFile)
+        }
+        let version = data[4..<6].reduce(0) { $0 << 8 | Int($1) }
+        let indexLength = data[6..<10].reduce(0) { $0 << 8 | Int($1) }
+        guard version == Self.supportedVersion, data.count >= headerSize + indexLength else {
+            throw CocoaError(.fileReadCorruptFile)
+        }
+        index = try JSONDecoder().decode(Index.self, from: data.subdata(in: headerSize..<(headerSize + indexLength)))
+        payloadStart = headerSize + indexLength
+    }
+
+    /// Decodes one lesson from its slice of the bundle. Pass english: true for English, false for Russian.
+    func lesson(for cloudIndex: Int, english: Bool) -> GeneratedLessonContent? {
+        let lang = english ? "en" : "ru"
+        let key = "\(lang)/\(cloudIndex)"
+        lock.lock()
+        defer { lock.unlock() }
+        if let cached = cache[key] { return cached }
+        guard let span = index.lessons[lang]?[String(cloudIndex)], span.count == 2 else { return nil }
+        let start = payloadStart + span[0]
+        let end = start + span[1]
+        guard start >= payloadStart, end <= data.count else { return nil }
+        var blob = data.subdata(in: start..<end)
+        if index.encoding == "deflate" {
+            guard let inflated = try? (blob as NSData).decompressed(using: .zlib) else { return nil }
+            blob = inflated as Data
+        }
+        guard let lesson = try? JSONDecoder().decode(GeneratedLessonContent.self, from: blob) else { return nil }
+        cache[key] = lesson
+        return lesson
+    }
+}
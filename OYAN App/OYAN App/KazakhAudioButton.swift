@@ -6,6 +6,7 @@
 //  Plays Kazakh text-to-speech via Supabase Edge Function (get-kazakh-audio).
 //  The Edge Function uses Microsoft Azure Speech Services for Kazakh TTS.
 //  Uses .playback so audio plays when device is silent.
+//  Phrases pre-rendered by scripts/prerender_audio.py ship with the app and play without a network call.
 //
 
 import SwiftUI
@@ -13,6 +14,43 @@ import AVFoundation
 
 private let kazakhAudioURL = URL(string: "https://porfjjvcnixghoxnbbdt.supabase.co/functions/v1/get-kazakh-audio")!
 
+/// Audio pre-rendered offline (prerendered_audio.json + <sha256>.mp3 in the app bundle), keyed by trimmed text.
+enum PrerenderedAudio {
+    private struct Manifest: Decodable {
+        struct Item: Decodable { let file: String }
+        let items: [String: Item]
+    }
+
+    private static let files: [String: String] = {
+        guard let url = Bundle.main.url(forResource: "prerendered_audio", withExtension: "json"),
+              let data = try? Data(contentsOf: url),
+              let manifest = try? JSONDecoder().decode(Manifest.self, from: data) else { return [:] }
+        return manifest.items.mapValues { $0.file }
+    }()
+
+    static func data(for text: String) -> Data? {
+        guard let file = files[text.trimmingCharacters(in: .whitespacesAndNewlines)] else { return nil }
+        let name = (file as NSString).deletingPathExtension
+        let ext = (file as NSString).pathExtension
+        guard let url = Bundle.main.url(forResource: name, withExtension: ext) else { return nil }
+        return try? Data(contentsOf: url)
+    }
+}
+
+private enum KazakhAudioError: LocalizedError {
+    case invalidResponse
+    case server(Int)
+    case empty
+
+    var errorDescription: String? {
+        switch self {
+        case .invalidResponse: return "Invalid response"
+        case .server(let code): return "Server error: \(code)"
+        case .empty: return "No audio data received"
+        }
+    }
+}
+
 struct KazakhAudioButton: View {
     let text: String
 
@@ -60,25 +98,7 @@ struct KazakhAudioButton: View {
         defer { isLoading = false }
 
         do {
-            var request = URLRequest(url: kazakhAudioURL)
-            request.httpMethod = "POST"
-            request.setValue("application/json", forHTTPHeaderField: "Content-Type")
-            request.setValue("Bearer \(SupabaseManager.shared.anonKey)", forHTTPHeaderField: "Authorization")
-            request.httpBody = try JSONEncoder().encode(["text": text])
-
-            let (data, response) = try await URLSession.shared.data(for: request)
-            guard let http = response as? HTTPURLResponse else {
-                await MainActor.run { errorMessage = "Invalid response"; showError = true }
-                return
-            }
-            guard (200...299).contains(http.statusCode) else {
-                await MainActor.run { errorMessage = "Server error: \(http.statusCode)"; showError = true }
-                return
-            }
-            guard !data.isEmpty else {
-                await MainActor.run { errorMessage = "No audio data received"; showError = true }
-                return
-            }
+            let data = try await Self.audioData(for: text)
 
             try await MainActor.run {
                 try AVAudioSession.sharedInstance().setCategory(.playback, mode: .default)
@@ -100,19 +120,28 @@ struct KazakhAudioButton: View {
         }
     }
 
+    /// Pre-rendered audio if bundled and playable, otherwise Kazakh TTS from the Edge Function.
+    private static func audioData(for text: String) async throws -> Data {
+        if let local = PrerenderedAudio.data(for: text), (try? AVAudioPlayer(data: local)) != nil { return local }
+        var request = URLRequest(url: kazakhAudioURL)
+        request.httpMethod = "POST"
+        request.setValue("application/json", forHTTPHeaderField: "Content-Type")
+        request.setValue("Bearer \(SupabaseManager.shared.anonKey)", forHTTPHeaderField: "Authorization")
+        request.httpBody = try JSONEncoder().encode(["text": text])
+
+        let (data, response) = try await URLSession.shared.data(for: request)
+        guard let http = response as? HTTPURLResponse else { throw KazakhAudioError.invalidResponse }
+        guard (200...299).contains(http.statusCode) else { throw KazakhAudioError.server(http.statusCode) }
+        guard !data.isEmpty else { throw KazakhAudioError.empty }
+        return data
+    }
+
     // MARK: - Static playback (e.g. for alphabet letter taps)
     /// Fetches Kazakh TTS for the given text and plays it. Uses .playback session so audio plays when silent.
     static func play(text: String) async {
         guard !text.isEmpty else { return }
         do {
-            var request = URLRequest(url: kazakhAudioURL)
-            request.httpMethod = "POST"
-            request.setValue("application/json", forHTTPHeaderField: "Content-Type")
-            request.setValue("Bearer \(SupabaseManager.shared.anonKey)", forHTTPHeaderField: "Authorization")
-            request.httpBody = try JSONEncoder().encode(["text": text])
-
-            let (data, response) = try await URLSession.shared.data(for: request)
-            guard let http = response as? HTTPURLResponse, (200...299).contains(http.statusCode), !data.isEmpty else { return }
+            let data = try await audioData(for: text)
 
             try await MainActor.run {
                 try? AVAudioSession.sharedInstance().setCategory(.playback, mode: .default)
@@ -1,25 +1,124 @@
 #!/usr/bin/env python3
-"""Makes the black background of eagle_book.png transparent.
-Run: pip3 install Pillow  (if needed), then: python3 make_eagle_transparent.py"""
+"""Makes the black background of eagle_book.png (or any imageset PNG) transparent.
+Run: pip3 install Pillow numpy  (if needed), then:
+  python3 make_eagle_transparent.py                      # eagle_book.png, as before
+  python3 make_eagle_transparent.py --all                # every *.imageset PNG in Assets.xcassets
+  python3 make_eagle_transparent.py "OYAN App/Assets.xcassets/eagle_*.imageset/*.png" --ramp 20 --jobs 4
 
-from PIL import Image
+Dark pixels (every channel below --threshold) get alpha 0. With --ramp N, pixels
+whose brightest channel is within N levels above the threshold fade in linearly,
+which keeps anti-aliased edges smooth. Files whose content hash matches what this
+tool last wrote with the same settings are skipped (.transparent_cache.json)."""
+
+import argparse
+import glob
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-img_path = os.path.join(script_dir, "Assets.xcassets/eagle_book.imageset/eagle_book.png")
-img = Image.open(img_path)
-img = img.convert("RGBA")
-data = img.getdata()
-
-new_data = []
-for item in data:
-    r, g, b, a = item
-    # Make black/dark pixels (background) transparent; fuzz ~30 for anti-aliased edges
-    if r < 30 and g < 30 and b < 30:
-        new_data.append((r, g, b, 0))
+assets_dir = os.path.join(script_dir, "OYAN App", "Assets.xcassets")
+default_image = os.path.join(assets_dir, "eagle_book.imageset", "eagle_book.png")
+cache_path = os.path.join(script_dir, ".transparent_cache.json")
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def make_transparent(rgba, threshold, ramp):
+    """Return a copy of an HxWx4 uint8 array with the dark background made transparent."""
+    out = rgba.copy()
+    peak = out[..., :3].max(axis=2)
+    if ramp <= 0:
+        out[..., 3][peak < threshold] = 0
     else:
-        new_data.append(item)
+        scale = np.clip((peak.astype(np.float32) - threshold) / ramp, 0.0, 1.0)
+        out[..., 3] = (out[..., 3] * scale).round().astype(np.uint8)
+    return out
+
+
+def process(path, threshold, ramp):
+    """Worker: rewrite one PNG in place. Returns (path, pixels, seconds, new sha256)."""
+    started = time.monotonic()
+    with Image.open(path) as img:
+        rgba = np.asarray(img.convert("RGBA"))
+    Image.fromarray(make_transparent(rgba, threshold, ramp), "RGBA").save(path)
+    return path, rgba.shape[0] * rgba.shape[1], time.monotonic() - started, file_sha256(path)
+
+
+def find_images(patterns, all_imagesets):
+    if all_imagesets:
+        patterns = list(patterns) + [os.path.join(assets_dir, "*.imageset", "*.png")]
+    if not patterns:
+        return [default_image]
+    found = set()
+    for pattern in patterns:
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(script_dir, pattern)
+        found.update(p for p in glob.glob(pattern) if p.lower().endswith(".png"))
+    return sorted(found)
+
+
+def load_cache():
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("patterns", nargs="*", help="PNG paths or globs (relative to this folder)")
+    parser.add_argument("--all", action="store_true", help="Process every *.imageset PNG in Assets.xcassets")
+    parser.add_argument("--threshold", type=int, default=30, help="Channel level below which a pixel is background")
+    parser.add_argument("--ramp", type=int, default=0, help="Soft alpha ramp width above the threshold (0 = hard cut)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Reprocess even if up to date")
+    args = parser.parse_args()
+
+    settings = f"threshold={args.threshold},ramp={args.ramp}"
+    cache = load_cache()
+    todo = []
+    for path in find_images(args.patterns, args.all):
+        key = os.path.relpath(path, script_dir)
+        entry = cache.get(key, {})
+        if not args.force and entry.get("settings") == settings and entry.get("sha256") == file_sha256(path):
+            print(f"Up to date: {key}")
+            continue
+        todo.append(path)
+
+    if not todo:
+        print("Done. Nothing to do.")
+        return
+
+    started = time.monotonic()
+    total_pixels = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(process, p, args.threshold, args.ramp) for p in todo]
+        for fut in futures:
+            path, pixels, seconds, digest = fut.result()
+            key = os.path.relpath(path, script_dir)
+            cache[key] = {"settings": settings, "sha256": digest}
+            total_pixels += pixels
+            print(f"{key}: {pixels / 1e6:.2f} MP in {seconds:.2f}s")
+    elapsed = time.monotonic() - started
+
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    rate = total_pixels / 1e6 / elapsed if elapsed > 0 else float("inf")
+    print(f"Done. {len(todo)} image(s), {total_pixels / 1e6:.2f} MP in {elapsed:.2f}s ({rate:.1f} MP/s).")
+
 
-img.putdata(new_data)
-img.save(img_path)
-print("Done. eagle_book.png now has transparent background.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Renders @1x/@2x/@3x variants of every imageset in Assets.xcassets and recompresses them.
+Run: pip3 install Pillow  (if needed), then:
+  python3 optimize_assets.py --dry-run          # report only
+  python3 optimize_assets.py                    # rewrite images + Contents.json
+  python3 optimize_assets.py eagle_book welcome_background --jobs 2
+
+Each imageset's largest listed image is the source. Before the first rewrite it is
+copied to asset_sources/ (outside the app target, so not bundled) and later runs
+render from that copy, never from their own output. asset_sources/sources.json
+records the original's and the written files' sha256 with the settings; an
+imageset whose files and settings still match is skipped (--force re-renders).
+Replacing an imageset's files by hand makes them the new source. The @3x variant is sized so
+its longest side is 3x the on-screen size in points (POINT_SIZES below, taken
+from the .frame() in the views; never upscaled), @2x and @1x are scaled from it.
+PNGs are palette-quantized when the mean error stays under --max-quant-error,
+otherwise saved as optimized truecolor PNG; JPEGs are re-encoded at --jpeg-quality.
+Prints a before/after table of bytes and decode time."""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageChops, ImageStat
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+assets_dir = os.path.join(script_dir, "OYAN App", "Assets.xcassets")
+sources_dir = os.path.join(script_dir, "asset_sources")
+record_path = os.path.join(sources_dir, "sources.json")
+
+# Longest displayed side in points, per imageset (from the views' .frame modifiers).
+POINT_SIZES = {
+    "eagle": 750,
+    "eagle_achievements": 280,
+    "eagle_book": 320,
+    "eagle_happy": 320,
+    "eagle_reason": 350,
+    "eagle_speech": 320,
+    "oyan_doing": 280,
+    "oyan_dombra": 280,
+    "red_book": 180,
+    # Full-screen backgrounds: tallest current iPhone screen.
+    "welcome_background": 932,
+    "lessons_background": 932,
+}
+DEFAULT_POINT_SIZE = 400
+SCALES = (1, 2, 3)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def decode_seconds(data, repeat=3):
+    """Best-of-N time to fully decode encoded image bytes."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def encode_png(img, max_quant_error):
+    """Smallest acceptable PNG encoding: palette if close enough, else optimized truecolor."""
+    img = img.convert("RGBA") if img.mode not in ("RGB", "RGBA") else img
+    buf = io.BytesIO()
+    img.save(buf, "PNG", optimize=True)
+    best = buf.getvalue()
+    quantized = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    error = max(ImageStat.Stat(ImageChops.difference(img, quantized.convert(img.mode))).mean)
+    if error <= max_quant_error:
+        buf = io.BytesIO()
+        quantized.save(buf, "PNG", optimize=True)
+        if len(buf.getvalue()) < len(best):
+            best = buf.getvalue()
+    return best
+
+
+def encode_jpeg(img, quality):
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def source_image(imageset_dir, contents):
+    """(entry, path) of the highest-scale image that has a file."""
+    with_files = [e for e in contents.get("images", []) if e.get("filename")]
+    if not with_files:
+        return None, None
+    entry = max(with_files, key=lambda e: int(e.get("scale", "1x").rstrip("x") or 1))
+    return entry, os.path.join(imageset_dir, entry["filename"])
+
+
+def files_match(imageset_dir, hashes):
+    """True if the imageset holds exactly the files in {filename: sha256}, unchanged."""
+    on_disk = {f for f in os.listdir(imageset_dir) if f != "Contents.json" and not f.startswith(".")}
+    return bool(hashes) and on_disk == set(hashes) and all(
+        file_sha256(os.path.join(imageset_dir, f)) == h for f, h in hashes.items())
+
+
+def optimize_imageset(imageset_dir, max_quant_error, jpeg_quality, dry_run, record=None, force=False):
+    """Worker: returns a result row dict, or None if the imageset has no image.
+
+    `record` is the imageset's sources.json entry from the last run; the row's
+    "record" is the entry to store after this one ("skipped" if nothing changed)."""
+    name = os.path.basename(imageset_dir)[:-len(".imageset")]
+    contents_path = os.path.join(imageset_dir, "Contents.json")
+    if not os.path.exists(contents_path):
+        return None
+    with open(contents_path, "r", encoding="utf-8") as f:
+        contents = json.load(f)
+    entry, src_path = source_image(imageset_dir, contents)
+    if not src_path or not os.path.exists(src_path):
+        return None
+    settings = (f"points={POINT_SIZES.get(name, DEFAULT_POINT_SIZE)},max_quant_error={max_quant_error},"
+                f"jpeg_quality={jpeg_quality}")
+
+    # The catalog is still what we wrote from a kept original: render from the original.
+    record = record or {}
+    kept_path = os.path.join(sources_dir, record["source"]) if record.get("source") else None
+    from_kept = (kept_path is not None and os.path.exists(kept_path)
+                 and file_sha256(kept_path) == record.get("sha256")
+                 and files_match(imageset_dir, record.get("outputs", {})))
+    if from_kept and record.get("settings") == settings and not force:
+        return {"name": name, "skipped": True, "record": record}
+
+    old_files = {e["filename"] for e in contents["images"] if e.get("filename")}
+    before_bytes = sum(os.path.getsize(os.path.join(imageset_dir, f)) for f in old_files
+                       if os.path.exists(os.path.join(imageset_dir, f)))
+    with open(src_path, "rb") as f:
+        before_decode = decode_seconds(f.read())
+    if from_kept:
+        src_path = kept_path
+    with open(src_path, "rb") as f:
+        src_data = f.read()
+
+    stem, ext = os.path.splitext(entry["filename"])
+    stem = stem.split("@")[0]
+    kept_name = record["source"] if from_kept else f"{name}{os.path.splitext(src_path)[1]}"
+    is_jpeg = ext.lower() in (".jpg", ".jpeg")
+    with Image.open(io.BytesIO(src_data)) as img:
+        img.load()
+        longest = max(img.size)
+        target3 = min(longest, POINT_SIZES.get(name, DEFAULT_POINT_SIZE) * 3)
+        variants = {}
+        for scale in SCALES:
+            side = max(1, round(target3 * scale / 3))
+            factor = side / longest
+            size = (max(1, round(img.width * factor)), max(1, round(img.height * factor)))
+            resized = img if size == img.size else img.resize(size, Image.Resampling.LANCZOS)
+            data = encode_jpeg(resized, jpeg_quality) if is_jpeg else encode_png(resized, max_quant_error)
+            filename = f"{stem}{ext}" if scale == 1 else f"{stem}@{scale}x{ext}"
+            variants[scale] = (filename, data, size)
+
+    after_bytes = sum(len(v[1]) for v in variants.values())
+    after_decode = decode_seconds(variants[3][1])
+    if not dry_run:
+        if not from_kept:
+            # Keep the full-resolution source before the catalog copy is replaced.
+            os.makedirs(sources_dir, exist_ok=True)
+            with open(os.path.join(sources_dir, kept_name), "wb") as f:
+                f.write(src_data)
+            if record.get("source") not in (None, kept_name) and os.path.exists(kept_path):
+                os.remove(kept_path)
+        for filename, data, _ in variants.values():
+            with open(os.path.join(imageset_dir, filename), "wb") as f:
+                f.write(data)
+        for old in old_files - {v[0] for v in variants.values()}:
+            os.remove(os.path.join(imageset_dir, old))
+        idiom = entry.get("idiom", "universal")
+        contents["images"] = [
+            {"filename": variants[s][0], "idiom": idiom, "scale": f"{s}x"} for s in SCALES
+        ]
+        with open(contents_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(contents, indent=2, separators=(",", " : ")) + "\n")
+    return {
+        "name": name,
+        "record": {
+            "source": kept_name,
+            "sha256": hashlib.sha256(src_data).hexdigest(),
+            "settings": settings,
+            "outputs": {filename: hashlib.sha256(data).hexdigest() for filename, data, _ in variants.values()},
+        },
+        "source_size": f"{longest}px",
+        "size_3x": "x".join(map(str, variants[3][2])),
+        "before_bytes": before_bytes,
+        "after_bytes": after_bytes,
+        "before_decode": before_decode,
+        "after_decode": after_decode,
+    }
+
+
+def load_records():
+    try:
+        with open(record_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help="Imageset names (default: all)")
+    parser.add_argument("--max-quant-error", type=float, default=1.0,
+                        help="Max mean per-channel error for palette PNGs (default: 1.0)")
+    parser.add_argument("--jpeg-quality", type=int, default=85)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--dry-run", action="store_true", help="Report sizes without writing files")
+    parser.add_argument("--force", action="store_true", help="Re-render even if up to date")
+    args = parser.parse_args()
+
+    imagesets = sorted(
+        os.path.join(assets_dir, d) for d in os.listdir(assets_dir)
+        if d.endswith(".imageset") and (not args.names or d[:-len(".imageset")] in args.names)
+    )
+    records = load_records()
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        rows = [r for r in pool.map(optimize_imageset, imagesets,
+                                    [args.max_quant_error] * len(imagesets),
+                                    [args.jpeg_quality] * len(imagesets),
+                                    [args.dry_run] * len(imagesets),
+                                    [records.get(os.path.basename(d)[:-len(".imageset")]) for d in imagesets],
+                                    [args.force] * len(imagesets)) if r]
+    for r in rows:
+        if r.get("skipped"):
+            print(f"Up to date: {r['name']}")
+    rows = [r for r in rows if not r.get("skipped")]
+    if not rows:
+        print("Done. Nothing to do.")
+        return
+    if not args.dry_run:
+        records.update((r["name"], r["record"]) for r in rows)
+        with open(record_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    print(f"{'imageset':<22} {'source':>8} {'@3x':>11} {'before':>11} {'after':>11} {'saved':>6} "
+          f"{'decode before':>14} {'decode @3x':>11}")
+    for r in rows:
+        saved = 1 - r["after_bytes"] / r["before_bytes"] if r["before_bytes"] else 0
+        print(f"{r['name']:<22} {r['source_size']:>8} {r['size_3x']:>11} {r['before_bytes']:>11,} "
+              f"{r['after_bytes']:>11,} {saved:>6.0%} {r['before_decode'] * 1000:>12.1f}ms "
+              f"{r['after_decode'] * 1000:>9.1f}ms")
+    before = sum(r["before_bytes"] for r in rows)
+    after = sum(r["after_bytes"] for r in rows)
+    print(f"Total: {before:,} -> {after:,} bytes in {time.monotonic() - started:.1f}s"
+          + (" (dry run, nothing written)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
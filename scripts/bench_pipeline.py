@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmark generate -> extract_json -> apply_generated_to_swift against the local
+mock Gemini server (mock_gemini_server.py), for 10 / 100 / 1000 synthetic clouds.
+
+Each stage runs in its own subprocess so its peak RSS can be read from
+getrusage(). Every run is appended to scripts/bench_results.json together with
+the git commit, and the table shows the change against the previous run of the
+same size and stage, so regressions are visible.
+
+Stages:
+  generate  generate_cloud() for every cloud through GeminiClient (no cache, no quota)
+  extract   extract_json() on every response text
+  apply     load_generated + repair_lesson + render_swift_case for every cloud, then one
+            index_cases + splice_cases over a copy of CourseStructure.swift
+
+Run:
+  python3 scripts/bench_pipeline.py
+  python3 scripts/bench_pipeline.py --sizes 10 100 --latency 0.2 --rate-429 0.05 --concurrency 16
+  python3 scripts/bench_pipeline.py --base-url http://127.0.0.1:8765/v1beta   # use a server you started
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(SCRIPT_DIR, "bench_results.json")
+STAGES = ("generate", "extract", "apply")
+FIRST_CLOUD = 5  # generated clouds start here in the real course
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def cloud_numbers(count: int) -> range:
+    return range(FIRST_CLOUD, FIRST_CLOUD + count)
+
+
+def synthetic_summary(cloud: int):
+    unit, lesson = divmod(cloud, 3)
+    return (f"Unit {unit}, Lesson {lesson + 1}: Synthetic benchmark lesson {cloud} (greetings, мен/сен).",
+            f"Unit 1 + Units 2-{unit - 1 if unit > 2 else 2}.")
+
+
+def run_generate(count: int, work_dir: str, base_url: str, concurrency: int) -> dict:
+    import generate_units_gemini as gen
+    from gemini_client import GeminiClient
+
+    gen.OUT_DIR = work_dir
+    client = GeminiClient("mock", gen.MODEL, base_url=base_url,
+                          requests_per_minute=None, tokens_per_minute=None, max_retries=8)
+    backend = gen.Backend("gemini", base_url)
+    retries = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(gen.generate_cloud, c, gen.build_prompt(*synthetic_summary(c)), backend, client)
+                   for c in cloud_numbers(count)]
+        for fut in futures:
+            retries += fut.result()[1]
+    # Keep the raw response texts for the extract stage.
+    with open(os.path.join(work_dir, "responses.json"), "w", encoding="utf-8") as f:
+        texts = []
+        for c in cloud_numbers(count):
+            with open(gen.output_path(c), "r", encoding="utf-8") as src:
+                texts.append(src.read())
+        json.dump(texts, f, ensure_ascii=False)
+    return {"requests": count + retries, "retries": retries}
+
+
+def run_extract(count: int, work_dir: str) -> dict:
+    from generate_units_gemini import extract_json
+
+    with open(os.path.join(work_dir, "responses.json"), "r", encoding="utf-8") as f:
+        texts = json.load(f)
+    started = time.perf_counter()
+    quiz_items = sum(len(extract_json(t).get("quiz", [])) for t in texts)
+    return {"quiz_items": quiz_items, "stage_seconds": time.perf_counter() - started}
+
+
+def run_apply(count: int, work_dir: str) -> dict:
+    import apply_generated_to_swift as apply
+    from swift_cases import LANG_FUNCS, index_cases, splice_cases
+
+    with open(apply.COURSE_FILE, "r", encoding="utf-8") as f:
+        content = f.read()
+    started = time.perf_counter()
+    index = index_cases(content)
+    replacements = {}
+    for c in cloud_numbers(count):
+        data = apply.load_generated(os.path.join(work_dir, f"cloud{c}.json"))
+        replacements[(LANG_FUNCS["en"], c)] = apply.render_swift_case(c, apply.repair_lesson(data, None, c)[0])
+    content, missing = splice_cases(content, index, replacements)
+    with open(os.path.join(work_dir, "CourseStructure.swift"), "w", encoding="utf-8") as f:
+        f.write(content)
+    return {"swift_bytes": len(content.encode("utf-8")), "missing": len(missing),
+            "stage_seconds": time.perf_counter() - started}
+
+
+def worker(args) -> None:
+    """Child process: run one stage and print its measurements as JSON."""
+    sys.path.insert(0, SCRIPT_DIR)
+    started = time.perf_counter()
+    if args.worker == "generate":
+        out = run_generate(args.clouds, args.work_dir, args.base_url, args.concurrency)
+    elif args.worker == "extract":
+        out = run_extract(args.clouds, args.work_dir)
+    else:
+        out = run_apply(args.clouds, args.work_dir)
+    out["seconds"] = time.perf_counter() - started
+    out["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(out))
+
+
+def run_stage(stage: str, count: int, work_dir: str, base_url: str, concurrency: int) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", stage, "--clouds", str(count),
+           "--work-dir", work_dir, "--base-url", base_url, "--concurrency", str(concurrency)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(SCRIPT_DIR))
+    if proc.returncode != 0:
+        raise RuntimeError(f"{stage} ({count} clouds) failed:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=SCRIPT_DIR, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=SCRIPT_DIR).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"runs": []}
+
+
+def previous_result(results: dict, clouds: int, stage: str):
+    for run in reversed(results["runs"]):
+        for row in run["results"]:
+            if row["clouds"] == clouds and row["stage"] == stage:
+                return row
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Cloud counts to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel generate requests (default: 8)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock server latency per response in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock responses that are HTTP 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of mock responses that are HTTP 429")
+    parser.add_argument("--base-url", help="Benchmark against this server instead of starting the mock")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSON file the run is appended to")
+    parser.add_argument("--note", default="", help="Free-form label stored with the run")
+    # Internal: run a single stage in a child process.
+    parser.add_argument("--worker", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--clouds", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return 0
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        from mock_gemini_server import start_server
+        # Retry-After 0 so injected 429s measure retry overhead, not sleeping.
+        server, mock, base_url = start_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                              rate_429=args.rate_429, retry_after=0)
+
+    results = load_results(args.results)
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "note": args.note,
+        "options": {"concurrency": args.concurrency, "latency": args.latency, "jitter": args.jitter,
+                    "error_rate": args.error_rate, "rate_429": args.rate_429,
+                    "server": args.base_url or "mock"},
+        "results": [],
+    }
+    print(f"{'clouds':>6} {'stage':<9} {'wall':>9} {'peak RSS':>10} {'req/s':>8} {'vs prev':>8}")
+    try:
+        for count in args.sizes:
+            work_dir = tempfile.mkdtemp(prefix=f"oyan-bench-{count}-")
+            try:
+                for stage in STAGES:
+                    out = run_stage(stage, count, work_dir, base_url, args.concurrency)
+                    row = {"clouds": count, "stage": stage, "seconds": round(out["seconds"], 4),
+                           "peak_rss_mb": round(out["peak_rss_mb"], 1)}
+                    if stage == "generate":
+                        row["requests"] = out["requests"]
+                        row["requests_per_sec"] = round(out["requests"] / out["seconds"], 2)
+                    else:
+                        row["stage_seconds"] = round(out["stage_seconds"], 4)
+                    prev = previous_result(results, count, stage)
+                    delta = f"{row['seconds'] / prev['seconds'] - 1:+.0%}" if prev and prev["seconds"] else "-"
+                    rps = f"{row['requests_per_sec']:.1f}" if "requests_per_sec" in row else "-"
+                    print(f"{count:>6} {stage:<9} {row['seconds']:>8.2f}s {row['peak_rss_mb']:>8.1f}MB "
+                          f"{rps:>8} {delta:>8}")
+                    run["results"].append(row)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        if server:
+            server.shutdown()
+
+    results["runs"].append(run)
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    print(f"Appended run to {args.results}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
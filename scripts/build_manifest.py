@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Build manifest shared by generate_units_gemini.py and apply_generated_to_swift.py.
+
+scripts/generated/manifest.json records, per cloud:
+  inputs   - fingerprint of everything the generator's prompt depends on
+  output   - SHA-256 of the cloudN.json written for those inputs
+  applied  - per language, the fingerprint of the cloudN.json + renderer last spliced
+             into CourseStructure.swift and the SHA-256 of the case text it rendered
+
+A cloud is regenerated only when its inputs fingerprint changed or its output file
+is missing or was edited; a Swift case is rewritten only when its applied
+fingerprint no longer matches or the case in the Swift file differs from what was rendered.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str):
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+def fingerprint(**parts) -> str:
+    """Hash of named inputs; key order does not matter."""
+    return sha256_text(json.dumps(parts, ensure_ascii=False, sort_keys=True))
+
+
+def load_manifest(gen_dir: str) -> dict:
+    path = os.path.join(gen_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": MANIFEST_VERSION, "clouds": {}}
+    if data.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "clouds": {}}
+    data.setdefault("clouds", {})
+    return data
+
+
+def save_manifest(gen_dir: str, manifest: dict) -> None:
+    path = os.path.join(gen_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def cloud_entry(manifest: dict, cloud: int) -> dict:
+    return manifest["clouds"].setdefault(str(cloud), {})
+
+
+def output_up_to_date(manifest: dict, cloud: int, inputs: str, output_path: str) -> bool:
+    """True if cloudN.json was produced from these inputs and has not been touched since."""
+    entry = manifest["clouds"].get(str(cloud), {})
+    if entry.get("inputs") != inputs:
+        return False
+    current = file_sha256(output_path)
+    return current is not None and current == entry.get("output")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Course outline shared by the content generators (scripts/curriculum.json).
+
+Each lesson lists its cloud number and summary. "prior" is the shorter label
+used when the lesson appears in a later lesson's prior context (defaults to the
+summary); "generate": false marks hand-written lessons that only provide context.
+"focus" names the Kazakh phrase for the listening intro and "quiz_items" the
+quiz length asked for.
+
+prior_context() with a token budget keeps the newest lessons verbatim and
+folds older ones into one line per unit, then into a single "Earlier units"
+line, so the prior section stays about the same size however long the course
+gets. The result only depends on the outline, so prompts stay cacheable.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from gemini_client import estimate_tokens
+
+DEFAULT_CURRICULUM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "curriculum.json")
+
+
+@dataclass
+class Lesson:
+    cloud: int
+    summary: str
+    prior: str = ""
+    generate: bool = True
+    focus: Optional[str] = None
+    quiz_items: str = "8-10"
+
+    @property
+    def prior_label(self) -> str:
+        return self.prior or self.summary
+
+    @property
+    def unit(self) -> Optional[int]:
+        """Unit number from a summary like "Unit 2, Lesson 1: ..."."""
+        m = re.match(r"Unit (\d+)", self.summary)
+        return int(m.group(1)) if m else None
+
+
+def load_curriculum(path: str = DEFAULT_CURRICULUM) -> list:
+    """Lessons from a curriculum file, ordered by cloud."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    lessons = [Lesson(**entry) for entry in data["lessons"]]
+    return sorted(lessons, key=lambda lesson: lesson.cloud)
+
+
+def _topic(lesson: Lesson) -> str:
+    """A lesson's prior label without its "Unit N, Lesson M:" prefix."""
+    return re.sub(r"^Unit \d+(,? Lesson \d+)?:?\s*", "", lesson.prior_label).rstrip(".") or lesson.prior_label
+
+
+def prior_context(lessons: list, cloud: int, budget: Optional[int] = None) -> str:
+    """Cumulative "Lesson N: ..." lines for every lesson before `cloud`, compressed to
+    about `budget` estimated tokens if given."""
+    prior = [lesson for lesson in lessons if lesson.cloud < cloud]
+    lines = [f"Lesson {lesson.cloud}: {lesson.prior_label}" for lesson in prior]
+    if not budget or estimate_tokens("\n".join(lines)) <= budget:
+        return "\n".join(lines)
+    # The newest lessons verbatim, in up to half the budget.
+    recent = []
+    while len(recent) < len(prior) and (
+            not recent or estimate_tokens("\n".join([lines[-len(recent) - 1]] + recent)) <= budget // 2):
+        recent.insert(0, lines[-len(recent) - 1])
+    older = prior[:len(prior) - len(recent)]
+    units = []  # [(unit, "Unit N: topic; topic")], oldest first
+    for lesson in older:
+        if units and units[-1][0] == lesson.unit:
+            units[-1] = (lesson.unit, f"{units[-1][1]}; {_topic(lesson)}")
+        else:
+            units.append((lesson.unit, f"Unit {lesson.unit}: {_topic(lesson)}"))
+    folded = []
+    while units and estimate_tokens("\n".join([u[1] for u in units] + recent)) > budget:
+        folded.append(units.pop(0)[0])
+    head = []
+    if folded:
+        numbers = [u for u in folded if u is not None]
+        span = (f"Unit {numbers[0]}" if numbers[0] == numbers[-1] else f"Units {numbers[0]}-{numbers[-1]}"
+                ) if numbers else "Earlier lessons"
+        head = [f"{span}: already covered."]
+    return "\n".join(head + [u[1] for u in units] + recent)
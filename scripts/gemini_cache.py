@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for Gemini responses, used by generate_units_gemini.py.
+
+Entries are keyed by a SHA-256 of the model name, the rendered prompt and the
+generationConfig, so an unchanged cloud is served locally instead of paying for
+another generateContent round-trip. Each entry is one JSON file; its mtime is
+bumped on every hit and the least recently used files are evicted once the
+directory grows past the size cap.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, ".gemini_cache")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def cache_key(model: str, prompt: str, generation_config: dict) -> str:
+    """Stable content hash for one request."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "generationConfig": generation_config},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-capped LRU cache of response texts stored as <key>.json files."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = json.load(f)["text"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str, meta: Optional[dict] = None) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "meta": meta or {}}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self._lock:
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Drop an entry, e.g. a response that turned out to be unusable."""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the directory fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Rate-limit-aware Gemini client shared by the content generators.
+
+- Keeps one persistent HTTPS connection per thread and host (HTTP keep-alive)
+  instead of opening a new urllib connection per call.
+- Throttles with token buckets for requests per minute and tokens per minute.
+- Retries 429 / 5xx / dropped connections with exponential backoff and full
+  jitter, honoring Retry-After headers and Gemini's RetryInfo.retryDelay.
+- Returns how many retries each call needed so batch runs can report them.
+- stream_generate() reads streamGenerateContent (SSE) chunk by chunk.
+- create_cached_content() uploads a shared instruction block once (context
+  caching); generate calls then reference it instead of resending it.
+- count_tokens() asks the countTokens endpoint for an exact prompt size.
+- Quota waits, HTTP round trips and backoff sleeps are pipeline_trace spans
+  (recorded only under --profile / --trace).
+"""
+
+import email.utils
+import http.client
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pipeline_trace import span
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiError(Exception):
+    """Non-retryable error, or a retryable one that ran out of attempts."""
+
+    def __init__(self, message: str, status: Optional[int] = None, body: str = "", retries: int = 0):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+        self.retries = retries
+
+
+@dataclass
+class CallResult:
+    text: str
+    retries: int = 0
+    usage: dict = field(default_factory=dict)
+    raw: dict = field(default_factory=dict)
+    texts: list = field(default_factory=list)  # every candidate's text (None if empty), for candidateCount > 1
+
+
+@dataclass
+class StreamChunk:
+    text: str
+    finish_reason: Optional[str] = None
+    usage: dict = field(default_factory=dict)
+    retries: int = 0
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute up to `capacity`.
+
+    consume() may drive the level negative (e.g. when the real token count of a
+    response exceeds the estimate); later acquire() calls wait for that debt.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until `amount` units are available, then take them. Returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return waited
+                delay = (amount - self.level) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self.level -= amount
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size before the API reports real usage (~4 chars per token)."""
+    return max(1, len(text) // 4)
+
+
+def parse_retry_after(headers, body: str) -> Optional[float]:
+    """Seconds to wait from a Retry-After header or a RetryInfo.retryDelay in the error body."""
+    value = headers.get("Retry-After") if headers else None
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    m = re.search(r'"retryDelay"\s*:\s*"([\d.]+)s"', body or "")
+    if m:
+        return float(m.group(1))
+    return None
+
+
+class GeminiClient:
+    def __init__(self, api_key: str, model: str, base_url: str = DEFAULT_BASE_URL,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, backoff_base: float = 2.0, backoff_max: float = 60.0,
+                 timeout: float = 90.0):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # -- connections -------------------------------------------------------
+
+    def _connection(self, parsed) -> http.client.HTTPConnection:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        key = (parsed.scheme, parsed.netloc)
+        conn = conns.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+            conn = conns[key] = cls(parsed.netloc, timeout=self.timeout)
+        return conn
+
+    def _drop_connection(self, parsed) -> None:
+        conns = getattr(self._local, "conns", {})
+        conn = conns.pop((parsed.scheme, parsed.netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self) -> None:
+        """Close this thread's connections."""
+        for conn in getattr(self._local, "conns", {}).values():
+            conn.close()
+        self._local.conns = {}
+
+    def _open(self, parsed, payload: dict, headers: Optional[dict] = None) -> http.client.HTTPResponse:
+        """Send one POST over the pooled connection; returns the response with only its headers read."""
+        path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        conn = self._connection(parsed)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        hdrs = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        hdrs.update(headers or {})
+        try:
+            conn.request("POST", path, body=body, headers=hdrs)
+            return conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            self._drop_connection(parsed)
+            raise
+
+    def _read(self, parsed, resp: http.client.HTTPResponse) -> str:
+        try:
+            data = resp.read().decode("utf-8", errors="replace")
+        except (http.client.HTTPException, OSError):
+            self._drop_connection(parsed)
+            raise
+        if resp.getheader("Connection", "").lower() == "close":
+            self._drop_connection(parsed)
+        return data
+
+    def post_json(self, url: str, payload: dict, headers: Optional[dict] = None):
+        """One POST over the pooled connection. Returns (status, headers, body_text)."""
+        parsed = urllib.parse.urlsplit(url)
+        resp = self._open(parsed, payload, headers)
+        return resp.status, resp.headers, self._read(parsed, resp)
+
+    # -- retries -----------------------------------------------------------
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _wait_for_quota(self, est_tokens: int) -> None:
+        if not (self.request_bucket or self.token_bucket):
+            return
+        with span("quota", tokens=est_tokens):
+            if self.request_bucket:
+                self.request_bucket.acquire(1)
+            if self.token_bucket and est_tokens:
+                self.token_bucket.acquire(est_tokens)
+
+    def _retry_or_raise(self, attempt: int, status: Optional[int], headers, body: str,
+                        est_tokens: int, on_retry) -> None:
+        """After a failed attempt: refund its token estimate, then sleep before the next one or raise."""
+        if self.token_bucket and est_tokens:
+            self.token_bucket.consume(-est_tokens)  # rejected calls do not count against the quota
+        if status is not None and status not in RETRY_STATUSES:
+            raise GeminiError(f"HTTP {status}: {body[:300]}", status, body, attempt)
+        if attempt >= self.max_retries:
+            raise GeminiError(f"Gave up after {attempt} retries (last: {status or body})", status, body, attempt)
+        retry_after = parse_retry_after(headers, body) if status is not None else None
+        delay = self._backoff(attempt, retry_after)
+        if on_retry:
+            on_retry(attempt + 1, status, delay)
+        with span("backoff", status=status, attempt=attempt + 1):
+            time.sleep(delay)
+
+    def request_with_retries(self, url: str, payload: dict, headers: Optional[dict] = None,
+                             est_tokens: int = 0, on_retry=None):
+        """POST with rate limiting and retries. Returns (parsed_json, retries)."""
+        attempt = 0
+        while True:
+            self._wait_for_quota(est_tokens)
+            with span("network", attempt=attempt) as counts:
+                try:
+                    status, resp_headers, body = self.post_json(url, payload, headers)
+                except (http.client.HTTPException, OSError) as e:
+                    status, resp_headers, body = None, None, str(e)
+                counts.update(status=status, bytes_in=len(body))
+            if status is not None and 200 <= status < 300:
+                try:
+                    return json.loads(body), attempt
+                except ValueError:
+                    raise GeminiError("Response is not JSON", status, body, attempt)
+            self._retry_or_raise(attempt, status, resp_headers, body, est_tokens, on_retry)
+            attempt += 1
+
+    # -- Gemini ------------------------------------------------------------
+
+    def generate_url(self, method: str = "generateContent") -> str:
+        return f"{self.base_url}/models/{self.model}:{method}?key={urllib.parse.quote(self.api_key)}"
+
+    @staticmethod
+    def _payload(prompt: str, generation_config: dict, cached_content: Optional[str]) -> dict:
+        payload = {"contents": [{"parts": [{"text": prompt}]}], "generationConfig": generation_config}
+        if cached_content:
+            payload["cachedContent"] = cached_content
+        return payload
+
+    def count_tokens(self, text: str, on_retry=None) -> int:
+        """Exact token count of `text` for this model (countTokens; not charged as generation)."""
+        data, _ = self.request_with_retries(self.generate_url("countTokens"),
+                                            {"contents": [{"parts": [{"text": text}]}]}, on_retry=on_retry)
+        return int(data.get("totalTokens", 0))
+
+    def create_cached_content(self, instructions: str, ttl_seconds: int = 3600, on_retry=None) -> str:
+        """Upload `instructions` as a cached system instruction. Returns its name ("cachedContents/...")
+        for generate(cached_content=...). The API rejects blocks below the model's minimum size."""
+        url = f"{self.base_url}/cachedContents?key={urllib.parse.quote(self.api_key)}"
+        payload = {"model": f"models/{self.model}", "systemInstruction": {"parts": [{"text": instructions}]},
+                   "ttl": f"{int(ttl_seconds)}s"}
+        data, retries = self.request_with_retries(url, payload, est_tokens=estimate_tokens(instructions),
+                                                  on_retry=on_retry)
+        if not data.get("name"):
+            raise GeminiError("No name in cachedContents response", 200, json.dumps(data)[:300], retries)
+        return data["name"]
+
+    def generate(self, prompt: str, generation_config: dict, on_retry=None,
+                 cached_content: Optional[str] = None) -> CallResult:
+        """Call generateContent and return the first non-empty candidate's text.
+
+        `texts` holds every candidate in the order the API returned them, None for an empty one.
+
+        `cached_content` names a create_cached_content() block that precedes `prompt`."""
+        payload = self._payload(prompt, generation_config, cached_content)
+        est = estimate_tokens(prompt)
+        data, retries = self.request_with_retries(self.generate_url(), payload, est_tokens=est, on_retry=on_retry)
+        usage = data.get("usageMetadata", {}) or {}
+        if self.token_bucket:
+            # Charge the difference between the estimate and what the call really cost.
+            actual = usage.get("totalTokenCount")
+            if actual:
+                self.token_bucket.consume(actual - est)
+        texts = ["".join(p.get("text", "") for p in c.get("content", {}).get("parts", [])).strip() or None
+                 for c in data.get("candidates") or []]
+        text = next((t for t in texts if t), None)
+        if text is None:
+            raise GeminiError("Empty Gemini response", 200, json.dumps(data)[:300], retries)
+        return CallResult(text=text, retries=retries, usage=usage, raw=data, texts=texts)
+
+    def stream_generate(self, prompt: str, generation_config: dict, on_retry=None,
+                        cached_content: Optional[str] = None):
+        """Call streamGenerateContent (SSE) and yield StreamChunk objects as they arrive.
+
+        Retries happen only until the response starts. A stream that breaks
+        later raises GeminiError; the caller keeps whatever it already received.
+        """
+        payload = self._payload(prompt, generation_config, cached_content)
+        parsed = urllib.parse.urlsplit(self.generate_url("streamGenerateContent") + "&alt=sse")
+        est = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            self._wait_for_quota(est)
+            resp, status, body = None, None, ""
+            with span("network", attempt=attempt) as counts:
+                try:
+                    resp = self._open(parsed, payload)
+                    status = resp.status
+                    if 200 <= status < 300:
+                        counts["status"] = status
+                        break
+                    body = self._read(parsed, resp)
+                except (http.client.HTTPException, OSError) as e:
+                    body = str(e)
+                counts.update(status=status, bytes_in=len(body))
+            self._retry_or_raise(attempt, status, resp.headers if resp else None, body, est, on_retry)
+            attempt += 1
+
+        usage = {}
+        finished = False
+        with span("stream", chunks=0, bytes_in=0) as counts:
+            try:
+                for raw in resp:
+                    counts["bytes_in"] += len(raw)
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    try:
+                        data = json.loads(line[len("data:"):])
+                    except ValueError:
+                        continue
+                    candidate = (data.get("candidates") or [{}])[0]
+                    text = "".join(p.get("text", "") for p in candidate.get("content", {}).get("parts", []))
+                    usage = data.get("usageMetadata") or usage
+                    counts["chunks"] += 1
+                    yield StreamChunk(text, candidate.get("finishReason"), usage, attempt)
+                finished = True
+            except (http.client.HTTPException, OSError) as e:
+                raise GeminiError(f"Stream interrupted: {e}", status, "", attempt)
+            finally:
+                # An abandoned or broken stream leaves unread bytes on the connection.
+                if not finished or resp.getheader("Connection", "").lower() == "close":
+                    self._drop_connection(parsed)
+                if self.token_bucket and usage.get("totalTokenCount"):
+                    self.token_bucket.consume(usage["totalTokenCount"] - est)
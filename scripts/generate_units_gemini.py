@@ -3,11 +3,51 @@
 Generate Unit 2 & 3 lesson content via Gemini API.
 Get API key from https://aistudio.google.com/app/apikey
 
+Lessons and their prior-lesson context come from scripts/curriculum.json.
+Requests go to one of three backends over a shared keep-alive connection pool:
+  gemini                   - Gemini generateContent directly (needs an API key)
+  gemini-generator         - the gemini-generator Edge Function (prompt proxy)
+  generate-course-content  - the generate-course-content Edge Function (Gemini + KazLLM)
+
 Run:
   GEMINI_API_KEY=yourkey python3 scripts/generate_units_gemini.py
   # or
   python3 scripts/generate_units_gemini.py --key=yourkey
 
+  # through an Edge Function instead (no Gemini key needed; the Supabase anon key instead)
+  SUPABASE_FUNCTIONS_AUTH="Bearer <anon key>" python3 scripts/generate_units_gemini.py --backend=gemini-generator
+  python3 scripts/generate_units_gemini.py --backend=generate-course-content --clouds 5 6 \
+      --functions-auth="Bearer <anon key>"
+  # send up to 4 prompts in parallel (default: one at a time)
+  python3 scripts/generate_units_gemini.py --concurrency=4
+  # ignore cached responses (--refresh still stores the new ones)
+  python3 scripts/generate_units_gemini.py --no-cache
+  python3 scripts/generate_units_gemini.py --refresh
+  # regenerate every cloud even if scripts/generated/manifest.json says it is up to date
+  python3 scripts/generate_units_gemini.py --force
+  # stream the response: quiz items are checked and saved as they arrive, and a reply
+  # cut off at maxOutputTokens keeps its complete items and asks only for the rest
+  python3 scripts/generate_units_gemini.py --stream
+  # print each prompt's size by section (instructions / prior / lesson) and exit
+  python3 scripts/generate_units_gemini.py --prompt-report [--count-tokens]
+  # fold older lessons so the prior-lesson context stays under ~300 tokens
+  python3 scripts/generate_units_gemini.py --prior-budget=300
+  # find near-duplicate questions/slides across clouds and regenerate the later clouds
+  # with a list of what not to repeat (scripts/generated/avoid.json is used whenever it exists)
+  python3 scripts/generate_units_gemini.py --avoid
+  # upload the shared instructions once (Gemini context caching) and send only the rest per cloud
+  python3 scripts/generate_units_gemini.py --context-cache
+  # ask for 3 candidate lessons per cloud, score each with lesson_repair, keep the best
+  python3 scripts/generate_units_gemini.py --candidates=3
+  # every run is logged to scripts/generated/journal.jsonl; after a crash, a quota
+  # exhaustion or Ctrl-C, run only the clouds the last run did not finish
+  python3 scripts/generate_units_gemini.py --resume
+  # where does the time go? per-stage totals, plus spans for chrome://tracing
+  python3 scripts/generate_units_gemini.py --profile
+  python3 scripts/generate_units_gemini.py --trace=/tmp/generate.jsonl   # and /tmp/generate.trace.json
+  # talk to a local stand-in instead of Google (see mock_gemini_server.py)
+  GEMINI_API_KEY=mock python3 scripts/generate_units_gemini.py --base-url=http://127.0.0.1:8765/v1beta
+
 Output: scripts/generated/cloud5.json ... cloud11.json
 Then run: python3 scripts/apply_generated_to_swift.py
 """
@@ -16,24 +56,101 @@ import argparse
 import json
 import os
 import sys
-import urllib.request
-import urllib.error
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
+
+from build_manifest import (cloud_entry, file_sha256, fingerprint, load_manifest,
+                            output_up_to_date, save_manifest, sha256_text)
+from curriculum import DEFAULT_CURRICULUM, Lesson, load_curriculum, prior_context
+from gemini_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResponseCache, cache_key
+from gemini_client import DEFAULT_BASE_URL, GeminiClient, GeminiError, estimate_tokens
+from job_journal import JobJournal, journal_path
+from lesson_repair import repair_lesson, score_lesson
+from lesson_stream import LESSON_FIELDS, LessonStreamParser, normalize_quiz_item, quiz_item_error
+from near_duplicates import course_passages, load_avoid, near_duplicates, update_avoid
+import pipeline_trace
+from pipeline_trace import span
+from vocabulary import Vocabulary, save_vocabulary, updated_vocabulary
 
-def get_api_key():
-    key = os.environ.get("GEMINI_API_KEY")
-    if key:
-        return key
+BACKENDS = ("gemini", "gemini-generator", "generate-course-content")
+DEFAULT_FUNCTIONS_URL = "https://porfjjvcnixghoxnbbdt.supabase.co/functions/v1"
+MAX_CONTINUATIONS = 2
+
+
+def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("--key", help="Gemini API key")
+    parser.add_argument("--backend", choices=BACKENDS, default="gemini",
+                        help="Where to send requests (default: gemini)")
+    parser.add_argument("--curriculum", default=DEFAULT_CURRICULUM, help="Curriculum file (default: scripts/curriculum.json)")
+    parser.add_argument("--clouds", type=int, nargs="+", help="Only generate these clouds")
+    parser.add_argument("--stream", action="store_true",
+                        help="Use streamGenerateContent and save quiz items as they arrive (gemini backend)")
+    parser.add_argument("--prompt-report", action="store_true",
+                        help="Print the token size of each prompt section for every cloud and exit")
+    parser.add_argument("--count-tokens", action="store_true",
+                        help="With --prompt-report, use the countTokens API instead of estimates")
+    parser.add_argument("--prior-budget", type=int, default=0,
+                        help="Compress prior-lesson context to about this many tokens (default: 0 = never)")
+    parser.add_argument("--avoid", action="store_true",
+                        help="First add near-duplicate questions and slides across clouds to avoid.json "
+                             "(near_duplicates.py); each cloud's prompt lists what it must not repeat")
+    parser.add_argument("--context-cache", action="store_true",
+                        help="Upload the shared instructions once as cached content (gemini backend)")
+    parser.add_argument("--context-cache-ttl", type=int, default=3600,
+                        help="Seconds the uploaded instructions stay cached (default: 3600)")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Candidate lessons per cloud; the one lesson_repair scores best is written (default: 1)")
+    parser.add_argument("--no-repair", action="store_true",
+                        help="Write responses as received instead of running lesson_repair on them")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of clouds to generate in parallel (default: 1)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print time spent per stage (prompt, quota, network, extract, repair, write) at the end")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write every stage span to FILE (JSONL) and a Chrome trace beside it; implies --profile")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Neither read nor write the local response cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached responses but store the fresh ones")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Response cache directory")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Evict least recently used cache entries above this size (default: 50)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate clouds even if their inputs are unchanged")
+    parser.add_argument("--resume", action="store_true",
+                        help="Only generate the clouds the last run left pending, in flight or failed (journal.jsonl)")
+    parser.add_argument("--rpm", type=float, default=15,
+                        help="Requests per minute allowed by the quota (default: 15, 0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=1_000_000,
+                        help="Tokens per minute allowed by the quota (default: 1000000, 0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Retries per call on 429/5xx with exponential backoff (default: 5)")
+    parser.add_argument("--base-url", default=os.environ.get("GEMINI_BASE_URL", DEFAULT_BASE_URL),
+                        help="Gemini API base URL (default: $GEMINI_BASE_URL or Google's v1beta endpoint)")
+    parser.add_argument("--functions-url", default=os.environ.get("SUPABASE_FUNCTIONS_URL", DEFAULT_FUNCTIONS_URL),
+                        help="Supabase Edge Functions base URL for the edge backends")
+    parser.add_argument("--functions-auth",
+                        help="Authorization header for the edge backends (or set SUPABASE_FUNCTIONS_AUTH)")
     args, _ = parser.parse_known_args()
-    return args.key
+    return args
+
 
-API_KEY = get_api_key()
-if not API_KEY:
-    print("ERROR: Set GEMINI_API_KEY or pass --key=YOUR_KEY. Get key from https://aistudio.google.com/app/apikey")
-    sys.exit(1)
+def get_api_key(args) -> Optional[str]:
+    """$GEMINI_API_KEY, or --key."""
+    return os.environ.get("GEMINI_API_KEY") or args.key
 
-API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={API_KEY}"
+
+def get_functions_auth(args) -> Optional[str]:
+    """$SUPABASE_FUNCTIONS_AUTH, or --functions-auth."""
+    return os.environ.get("SUPABASE_FUNCTIONS_AUTH") or args.functions_auth
+
+MODEL = "gemini-1.5-flash"
+GENERATION_CONFIG = {"maxOutputTokens": 4096, "temperature": 0.4, "responseMimeType": "application/json"}
+OUT_DIR = "scripts/generated"
 
 UNIT1_REF = '''
 Unit 1 format (FOLLOW EXACTLY):
@@ -45,40 +162,45 @@ Unit 1 format (FOLLOW EXACTLY):
 - Every multiple-choice, translate, and fill-in question MUST have at least 3 options (preferably 4). Never use 2 options.
 '''
 
-SUMMARIES = {
-    5: ("Unit 2, Lesson 1: Greeting and farewell (Сәлем, сәлеметсіз бе. Сау бол, сау болыңыз).",
-        "Unit 1: synharmonism, sounds, first law. бас, доп, қыз, кет, көз, сәт."),
-    6: ("Unit 2, Lesson 2: First vocabulary (мұғалім, сыныптасы). Usage: teacher → Сәлеметсіз бе, classmate → Сәлем.",
-        "Unit 1 + Unit 2 Lesson 1 (greetings, farewells)."),
-    7: ("Unit 2 Test: Greeting, farewell, vocabulary (мұғалім, сыныптасы), when Сәлем vs Сәлеметсіз бе.",
-        "Unit 1 + Unit 2 Lessons 1-2."),
-    8: ("Unit 3, Lesson 1: Me and you (мен, сен) + vocabulary (оқушы). Personal endings coming next.",
-        "Unit 1 + Unit 2."),
-    9: ("Unit 3, Lesson 2: Personal endings (мен: -мың/-мін; сен: -сың/-сің). Examples: Мен мұғаліммін, Сен оқушысың.",
-        "Unit 1 + Unit 2 + Unit 3 Lesson 1."),
-    10: ("Unit 3, Lesson 3: Usage (Мен мұғаліммін, сен оқушысың). Put it together.",
-        "Unit 1 + Unit 2 + Unit 3 Lessons 1-2."),
-    11: ("Unit 3 Test: мен/сен, оқушы, personal endings, sentences Мен мұғаліммін, Сен оқушысың.",
-        "All prior units."),
+# Formatting rules sent through the gemini-generator Edge Function (it forwards the prompt as-is).
+GENERATOR_RULES = '''Output ONLY valid JSON. Use this exact structure:
+{
+  "title": "Short title",
+  "explanation_slides": ["slide1", "slide2", ...],
+  "examples": ["Kazakh — English", ...],
+  "quiz": [...]
 }
+TARGET AUDIENCE: Lessons are for complete beginners who do NOT know Kazakh — they cannot read, write, speak, or listen to it. All explanations MUST be in English. Do not assume any prior knowledge of the Kazakh script, sounds, or grammar.
+
+FORMATTING RULES (critical - match Unit 1 style):
+1) HIGHLIGHTS: Wrap important terms and key phrases in **double asterisks**. Example: "Use **Сәлем** for informal greeting." The app will show **text** in orange. Highlight 2-4 key terms per slide (Kazakh words, main concepts).
+2) PARAGRAPHS: Split each explanation_slides item into 2-4 SHORT mini-paragraphs. Use \\n\\n between them. NEVER write one long block of sentences. Example: "First sentence or two.\\n\\nSecond mini-paragraph here.\\n\\nThird short chunk." Like Unit 1: each slide feels broken into digestible pieces.
+3) Keep each slide 2-4 sentences total, split across mini-paragraphs.
+correct_index 0-based. For listening: question_type "listening", audio_text with Kazakh. For connect-by-sound: question "Connect by sound: [phrase]" (include the Kazakh phrase), points 2.
+CRITICAL: Every quiz item MUST have a clear "question" field. NEVER use "?" or leave question empty.
+MULTIPLE CHOICE: Every multiple-choice, translate, and fill-in question MUST have at least 3 answer options (preferably 4). Never use 2 options or placeholder "—".
+FILL-IN: Put blank AFTER the word (e.g. "Мен дәрігер____"). For "X ... (Y)" use "X Y____" with endings as options.
+NO DUPLICATES: Never use both "Сәлем" and "Сәлем!" or мұғаліммін twice. All options must be distinct.
+MATCH: Include pairs {kazakh, english}. Never use Yes/No for matching questions.
+connect_by_sound: ONLY for Unit 1 (clouds 1-4) with options like ["Жү","Мы","сық","рек"]. For Unit 2 & 3, use multiple_choice instead (e.g. "What does X mean?").'''
 
 
-def call_gemini(prompt: str) -> str:
-    req = urllib.request.Request(
-        API_URL,
-        data=json.dumps({
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {"maxOutputTokens": 4096, "temperature": 0.4, "responseMimeType": "application/json"},
-        }).encode(),
-        headers={"Content-Type": "application/json"},
-        method="POST",
+def model_id(base_url: str = DEFAULT_BASE_URL) -> str:
+    """Model name for cache keys and fingerprints; non-default endpoints (e.g. a mock) get their own namespace."""
+    return MODEL if base_url.rstrip("/") == DEFAULT_BASE_URL else f"{MODEL}@{base_url.rstrip('/')}"
+
+
+def make_client(args, api_key: Optional[str]) -> GeminiClient:
+    return GeminiClient(
+        api_key or "", MODEL, base_url=args.base_url,
+        requests_per_minute=args.rpm or None,
+        tokens_per_minute=args.tpm or None,
+        max_retries=args.max_retries,
     )
-    with urllib.request.urlopen(req, timeout=90) as r:
-        data = json.load(r)
-    text = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-    if not text:
-        raise ValueError("Empty Gemini response")
-    return text.strip()
+
+
+def log_retry(n, status, delay):
+    print(f"  retry {n} after HTTP {status or 'error'}, waiting {delay:.1f}s")
 
 
 def extract_json(text: str) -> dict:
@@ -89,17 +211,11 @@ def extract_json(text: str) -> dict:
     return json.loads(text[start:end])
 
 
-def main():
-    os.makedirs("scripts/generated", exist_ok=True)
-    for cloud, (summary, prior) in SUMMARIES.items():
-        prompt = f"""You are a Kazakh language lesson generator for OYAN app. Generate lesson content in JSON.
+# Shared by every gemini prompt, and first in it, so it can be sent once with --context-cache.
+GEMINI_INSTRUCTIONS = f"""You are a Kazakh language lesson generator for OYAN app. Generate lesson content in JSON.
 
 {UNIT1_REF}
 
-Prior lessons: {prior}
-
-Current lesson summary: {summary}
-
 Output ONLY valid JSON (no markdown):
 {{
   "title": "Short title",
@@ -111,23 +227,602 @@ Output ONLY valid JSON (no markdown):
   ]
 }}
 
-Use correct_index 0-based. All Kazakh must be grammatically correct. Output ONLY the JSON object."""
+Use correct_index 0-based. All Kazakh must be grammatically correct."""
+
+GENERATOR_INSTRUCTIONS = f"You are a Kazakh lesson generator for OYAN. {GENERATOR_RULES}"
+PROMPT_SECTIONS = ("instructions", "prior", "avoid", "lesson")
+
+
+def avoid_section(avoid) -> str:
+    """Questions and slides other lessons already use (avoid.json, see near_duplicates.py).
+    Empty when there are none, so such prompts are unchanged."""
+    if not avoid:
+        return ""
+    listed = "\n".join(f"- {text}" for text in avoid)
+    return f"\n\nAlready used in other lessons; write different questions and explanations, not these:\n{listed}"
+
+
+def prompt_sections(summary: str, prior: str, avoid=()) -> dict:
+    """The gemini prompt for one cloud split into PROMPT_SECTIONS; joined they are the prompt."""
+    return {
+        "instructions": GEMINI_INSTRUCTIONS,
+        "prior": f"\n\nPrior lessons: {prior}",
+        "avoid": avoid_section(avoid),
+        "lesson": f"\n\nCurrent lesson summary: {summary}\n\nOutput ONLY the JSON object.",
+    }
+
+
+def generator_prompt_sections(lesson: Lesson, prior: str, avoid=()) -> dict:
+    intro = f"Include 1 listening intro question for {lesson.focus}. " if lesson.focus else ""
+    return {
+        "instructions": GENERATOR_INSTRUCTIONS,
+        "prior": f"\n\nPrior: {prior}",
+        "avoid": avoid_section(avoid),
+        "lesson": f"\n\nGenerate lesson for: {lesson.summary}\n\n{intro}{lesson.quiz_items} quiz items total. "
+                  f"Output ONLY the JSON object.",
+    }
+
+
+def build_prompt(summary: str, prior: str, avoid=()) -> str:
+    return "".join(prompt_sections(summary, prior, avoid).values())
+
+
+def build_generator_prompt(lesson: Lesson, prior: str, avoid=()) -> str:
+    return "".join(generator_prompt_sections(lesson, prior, avoid).values())
+
+
+@dataclass
+class Backend:
+    """Where a cloud's request goes, and how its body is built and its answer read."""
+
+    name: str = "gemini"
+    base_url: str = DEFAULT_BASE_URL
+    functions_url: str = DEFAULT_FUNCTIONS_URL
+    functions_auth: Optional[str] = None
+    cached_content: Optional[str] = None  # name of the uploaded GEMINI_INSTRUCTIONS (--context-cache)
+
+    def endpoint(self) -> str:
+        """Identifies the backend in cache keys and fingerprints."""
+        if self.name == "gemini":
+            return model_id(self.base_url)
+        return f"{self.functions_url.rstrip('/')}/{self.name}"
+
+    def sections(self, lesson: Lesson, prior: str, avoid=()) -> dict:
+        """What one cloud's request is made of, by PROMPT_SECTIONS. The edge function
+        behind generate-course-content keeps its instructions server-side."""
+        if self.name == "gemini":
+            return prompt_sections(lesson.summary, prior, avoid)
+        if self.name == "gemini-generator":
+            return generator_prompt_sections(lesson, prior, avoid)
+        return {"instructions": "", "prior": prior, "avoid": "\n".join(avoid), "lesson": lesson.summary}
+
+    def request_body(self, lesson: Lesson, prior: str, avoid=()) -> str:
+        """The prompt (gemini, gemini-generator) or JSON payload (generate-course-content) for one cloud."""
+        if self.name == "generate-course-content":
+            payload = {"unit_summary": lesson.summary, "prior_lessons_summary": prior, "cloud_index": lesson.cloud}
+            if avoid:
+                payload["avoid"] = list(avoid)
+            return json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return "".join(self.sections(lesson, prior, avoid).values())
+
+    def split_cached(self, prompt: str):
+        """(text to send, cached content name): drops the uploaded instructions from the prompt."""
+        if self.cached_content and prompt.startswith(GEMINI_INSTRUCTIONS):
+            return prompt[len(GEMINI_INSTRUCTIONS):].lstrip("\n"), self.cached_content
+        return prompt, None
+
+    def call(self, client: GeminiClient, body: str):
+        """Send one request through the client's pooled connections. Returns (text, retries, usage)."""
+        if self.name == "gemini":
+            prompt, cached = self.split_cached(body)
+            result = client.generate(prompt, GENERATION_CONFIG, on_retry=log_retry, cached_content=cached)
+            return result.text, result.retries, result.usage
+        if self.name == "gemini-generator":
+            payload = {"prompt": body, "maxOutputTokens": GENERATION_CONFIG["maxOutputTokens"],
+                       "temperature": GENERATION_CONFIG["temperature"]}
+        else:
+            payload = json.loads(body)
+        data, retries = client.request_with_retries(
+            self.endpoint(), payload, headers={"Authorization": self.functions_auth},
+            est_tokens=estimate_tokens(body), on_retry=log_retry,
+        )
+        if isinstance(data, dict) and data.get("error"):
+            raise GeminiError(f"{self.name}: {json.dumps(data['error'], ensure_ascii=False)[:300]}",
+                              body=json.dumps(data)[:300], retries=retries)
+        if self.name == "generate-course-content":
+            return json.dumps(data, ensure_ascii=False), retries, {}
+        candidate = (data.get("candidates") or [{}])[0]
+        text = (candidate.get("content", {}).get("parts", [{}])[0].get("text")
+                or candidate.get("output") or data.get("text") or "")
+        if not text:
+            raise GeminiError(f"{self.name}: no text in response", 200, json.dumps(data)[:300], retries)
+        return text.strip(), retries, data.get("usageMetadata", {}) or {}
+
+    def call_candidates(self, client: GeminiClient, body: str, n: int):
+        """n answers to one request. Returns (texts, retries, usage); texts[i] is None if answer i is missing.
+
+        Gemini returns them from one call (candidateCount); the Edge Functions take
+        n calls in parallel, and the answers that arrive are kept if any do."""
+        if self.name == "gemini":
+            prompt, cached = self.split_cached(body)
+            result = client.generate(prompt, {**GENERATION_CONFIG, "candidateCount": n}, on_retry=log_retry,
+                                     cached_content=cached)
+            return result.texts, result.retries, result.usage
+        texts, retries, failures = [], 0, []
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            for fut in [pool.submit(self.call, client, body) for _ in range(n)]:
+                try:
+                    text, call_retries, _ = fut.result()
+                    texts.append(text or None)
+                    retries += call_retries
+                except GeminiError as e:
+                    texts.append(None)
+                    failures.append(e)
+                    retries += e.retries
+        if not any(texts):
+            failures[0].retries = retries
+            raise failures[0]
+        return texts, retries, {}
+
+
+def continuation_prompt(prompt: str, kept: dict, missing: list) -> str:
+    """Ask for only the part of a cut-off lesson that did not arrive."""
+    rest = ""
+    if "quiz" in missing:
+        rest = (f" For quiz, output only the remaining items that follow the {len(kept.get('quiz', []))}"
+                f" already received; do not repeat them.")
+    return f"""{prompt}
 
-        print(f"Calling Gemini for cloud {cloud}...")
+Your previous answer was cut off. This part of it arrived complete and is kept as is:
+{json.dumps(kept, ensure_ascii=False)}
+
+Output ONLY a JSON object with the missing fields: {", ".join(missing)}.{rest}"""
+
+
+def stream_lesson(cloud: int, prompt: str, client: GeminiClient, backend: Optional[Backend] = None):
+    """Stream one lesson, checking each quiz item as it completes and appending it to
+    cloudN.partial.jsonl. A response that stops early (MAX_TOKENS or a dropped stream)
+    keeps its complete fields and items; up to MAX_CONTINUATIONS follow-up requests ask
+    for the rest. Returns (text, retries, usage) like Backend.call(). `backend` supplies the
+    --context-cache instructions, if any."""
+    started = time.monotonic()
+    lesson = {}
+    items = []
+    retries = 0
+    tokens = {}
+    first_item = None
+    with open(partial_path(cloud), "w", encoding="utf-8") as partial:
+        def record(kind, value):
+            partial.write(json.dumps({kind: value}, ensure_ascii=False) + "\n")
+            partial.flush()
+
+        def on_field(name, value):
+            if name not in lesson:
+                lesson[name] = value
+                record(name, value)
+
+        def on_item(q):
+            nonlocal first_item
+            error = quiz_item_error(q)
+            if error:
+                print(f"  cloud {cloud}: dropped streamed quiz item ({error})")
+                return
+            q = normalize_quiz_item(q)
+            if q in items:
+                return
+            items.append(q)
+            record("quiz_item", q)
+            if first_item is None:
+                first_item = time.monotonic() - started
+
+        request = prompt
+        quiz_done = False
+        for round_ in range(MAX_CONTINUATIONS + 1):
+            parser = LessonStreamParser(on_item=on_item, on_field=on_field)
+            finish = None
+            usage = {}
+            round_retries = 0
+            try:
+                sent, cached = backend.split_cached(request) if backend else (request, None)
+                for chunk in client.stream_generate(sent, GENERATION_CONFIG, on_retry=log_retry,
+                                                    cached_content=cached):
+                    parser.feed(chunk.text)
+                    finish = chunk.finish_reason or finish
+                    usage = chunk.usage
+                    round_retries = chunk.retries
+            except GeminiError as e:
+                # A continuation that fails keeps what earlier rounds collected, unless the quota is gone.
+                if not parser.started and (round_ == 0 or e.status == 429):
+                    raise
+                finish = str(e)
+                round_retries = e.retries
+            retries += round_retries
+            if not parser.started:
+                if round_ == 0:
+                    raise GeminiError("No JSON in streamed response", 200, retries=retries)
+                finish = finish or "no JSON"
+            for key in ("promptTokenCount", "candidatesTokenCount", "totalTokenCount"):
+                tokens[key] = tokens.get(key, 0) + usage.get(key, 0)
+            quiz_done = quiz_done or parser.quiz_closed
+            missing = [f for f in LESSON_FIELDS if f != "quiz" and f not in lesson] + ([] if quiz_done else ["quiz"])
+            if parser.done or not missing:
+                break
+            if round_ == MAX_CONTINUATIONS:
+                raise GeminiError(f"Lesson still incomplete after {MAX_CONTINUATIONS} continuations "
+                                  f"(missing: {', '.join(missing)}; {len(items)} quiz items)", retries=retries)
+            print(f"  cloud {cloud}: response stopped ({finish or 'stream ended'}) with {len(items)} quiz items; "
+                  f"requesting {', '.join(missing)}")
+            request = continuation_prompt(prompt, {**lesson, "quiz": items}, missing)
+    if first_item is not None:
+        print(f"  cloud {cloud}: first quiz item after {first_item:.1f}s")
+    return json.dumps({**lesson, "quiz": items}, ensure_ascii=False), retries, tokens
+
+
+def usage_counts(usage: dict) -> dict:
+    """Token counts of a response's usageMetadata, as pipeline_trace span counts."""
+    return {"tokens_in": usage.get("promptTokenCount", 0), "tokens_out": usage.get("candidatesTokenCount", 0)}
+
+
+def call_backend(backend: Backend, body: str, client: GeminiClient, cache: Optional[ResponseCache] = None,
+                 refresh: bool = False, fetch=None, check=None):
+    """Returns (check(text), retries), or (text, retries) without `check`. Cached responses report 0 retries.
+
+    `fetch` replaces backend.call(client, body) for a cache miss (e.g. stream_lesson).
+    `check` raises ValueError for a response that is no use; only responses that pass
+    it are cached, and a cached one that fails it is evicted and fetched again."""
+    check = check or (lambda text: text)
+    key = cache_key(backend.endpoint(), body, GENERATION_CONFIG) if cache else None
+    if cache and not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            try:
+                return check(cached), 0
+            except ValueError:
+                cache.delete(key)
+    with span("call") as counts:
+        text, retries, usage = fetch() if fetch else backend.call(client, body)
+        counts.update(retries=retries, **usage_counts(usage))
+    value = check(text)
+    if cache:
+        cache.put(key, text, {"model": backend.endpoint(), "usage": usage})
+    return value, retries
+
+
+def call_candidates(backend: Backend, body: str, client: GeminiClient, n: int,
+                    cache: Optional[ResponseCache] = None, refresh: bool = False, check=None):
+    """Like call_backend() for --candidates: returns (check(texts), retries). The n texts are
+    cached together, under a key that includes n, once they pass `check`."""
+    check = check or (lambda texts: texts)
+    key = cache_key(backend.endpoint(), body, {**GENERATION_CONFIG, "candidateCount": n}) if cache else None
+    if cache and not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            try:
+                return check(json.loads(cached)), 0
+            except ValueError:
+                cache.delete(key)
+    with span("call", candidates=n) as counts:
+        texts, retries, usage = backend.call_candidates(client, body, n)
+        counts.update(retries=retries, **usage_counts(usage))
+    value = check(texts)
+    if cache:
+        cache.put(key, json.dumps(texts, ensure_ascii=False), {"model": backend.endpoint(), "usage": usage})
+    return value, retries
+
+
+def input_fingerprint(backend: Backend, body: str, candidates: int = 1) -> str:
+    """Fingerprint of everything cloudN.json depends on (recorded in manifest.json)."""
+    parts = dict(
+        backend=backend.endpoint(),
+        request=sha256_text(body),
+        generation_config=GENERATION_CONFIG,
+    )
+    if candidates > 1:
+        parts["candidates"] = candidates
+    return fingerprint(**parts)
+
+
+def output_path(cloud: int) -> str:
+    return os.path.join(OUT_DIR, f"cloud{cloud}.json")
+
+
+def partial_path(cloud: int) -> str:
+    """Streamed fields and quiz items of a cloud still being generated, one JSON object per line."""
+    return os.path.join(OUT_DIR, f"cloud{cloud}.partial.jsonl")
+
+
+def parse_lesson(text: str, cloud: Optional[int] = None) -> dict:
+    """The lesson JSON in a response; ValueError if there is none or it has no quiz."""
+    with span("extract", cloud=cloud, chars=len(text)):
+        obj = extract_json(text)
+        if not isinstance(obj, dict) or not isinstance(obj.get("quiz"), list) or not obj["quiz"]:
+            raise ValueError("Lesson has no quiz")
+        obj["quiz"] = [
+            {**q, "correct_index": q.get("correct_index", q.get("correctIndex", 0))}
+            for q in obj.get("quiz", [])
+        ]
+    return obj
+
+
+def best_candidate(texts: list, vocab: Optional[Vocabulary], cloud: int, quiz_items=None):
+    """Repair and score every candidate text. Returns (repaired lesson, report, scores, chosen index);
+    the fewest errors win, then the lowest penalty, and ties go to the earlier candidate. Missing or
+    unparseable texts score None, so each index still names the candidate the backend returned."""
+    best = None
+    scores = []
+    for i, text in enumerate(texts):
+        if text is None:
+            scores.append(None)
+            continue
+        try:
+            obj = parse_lesson(text, cloud)
+        except ValueError:
+            scores.append(None)
+            continue
+        repaired, report = repair_lesson(obj, vocab, cloud)
+        score = score_lesson(obj, report, quiz_items)
+        scores.append(score)
+        rank = (score["errors"], score["penalty"])
+        if best is None or rank < (scores[best[3]]["errors"], scores[best[3]]["penalty"]):
+            best = (repaired, report, scores, i)
+    if best is None:
+        raise ValueError(f"No JSON in any of {len(texts)} candidates")
+    return best
+
+
+def generate_cloud(cloud: int, body: str, backend: Backend, client: GeminiClient,
+                   cache: Optional[ResponseCache] = None, refresh: bool = False, stream: bool = False,
+                   repair: bool = False, vocab: Optional[Vocabulary] = None, candidates: int = 1,
+                   quiz_items=None):
+    """Generate one cloud and write scripts/generated/cloudN.json. Returns (elapsed seconds, retries, report).
+
+    With `repair`, quiz items are fixed by lesson_repair before the file is written and
+    its report is returned; otherwise report is None. `vocab` supplies course distractors.
+    With `candidates` > 1 (needs `repair`), that many answers are scored by score_lesson
+    against the curriculum's `quiz_items` and only the best is written; report then also
+    holds "candidates" (each score, or None if unparseable) and "chosen" (its index)."""
+    started = time.monotonic()
+    report = None
+    with span("cloud", cloud=cloud) as counts:
+        if candidates > 1:
+            best, retries = call_candidates(backend, body, client, candidates, cache=cache, refresh=refresh,
+                                            check=lambda texts: best_candidate(texts, vocab, cloud, quiz_items))
+            obj, report, scores, chosen = best
+            report = {**report, "candidates": scores, "chosen": chosen}
+        else:
+            fetch = (lambda: stream_lesson(cloud, body, client, backend)) if stream else None
+            try:
+                obj, retries = call_backend(backend, body, client, cache=cache, refresh=refresh, fetch=fetch,
+                                            check=lambda text: parse_lesson(text, cloud))
+            except Exception:
+                if stream and os.path.exists(partial_path(cloud)):
+                    os.remove(partial_path(cloud))
+                raise
+            if repair:
+                obj, report = repair_lesson(obj, vocab, cloud)
+        with span("write", cloud=cloud) as written:
+            text = json.dumps(obj, ensure_ascii=False, indent=2)
+            with open(output_path(cloud), "w", encoding="utf-8") as f:
+                f.write(text)
+            written["bytes"] = len(text.encode("utf-8"))
+        counts["retries"] = retries
+    if stream and os.path.exists(partial_path(cloud)):
+        os.remove(partial_path(cloud))
+    return time.monotonic() - started, retries, report
+
+
+def section_tokens(backend: Backend, targets: list, priors: dict, measure=estimate_tokens,
+                   avoids: Optional[dict] = None) -> dict:
+    """{cloud: {section: tokens}} for each target's request; identical texts are measured once."""
+    measured = {}
+    sizes = {}
+    for lesson in targets:
+        sections = backend.sections(lesson, priors[lesson.cloud], (avoids or {}).get(lesson.cloud, ()))
+        for text in sections.values():
+            if text not in measured:
+                measured[text] = measure(text) if text else 0
+        sizes[lesson.cloud] = {name: measured[text] for name, text in sections.items()}
+    return sizes
+
+
+def print_prompt_report(sizes: dict, exact: bool) -> None:
+    print(f"Prompt tokens by section ({'countTokens' if exact else 'estimated'}):")
+    print(f"  {'cloud':>5} " + " ".join(f"{name:>12}" for name in PROMPT_SECTIONS) + f" {'total':>8}")
+    for cloud, by_section in sizes.items():
+        print(f"  {cloud:>5} " + " ".join(f"{by_section[name]:>12}" for name in PROMPT_SECTIONS)
+              + f" {sum(by_section.values()):>8}")
+    if sizes:
+        per_cloud = [sum(v.values()) - v["instructions"] for v in sizes.values()]
+        shared = max(v["instructions"] for v in sizes.values())
+        print(f"  instructions: {shared} tokens, the same in every prompt (--context-cache sends them once)")
+        print(f"  prior + avoid + lesson: {min(per_cloud)}-{max(per_cloud)} tokens per cloud "
+              f"(--prior-budget caps the prior)")
+
+
+def main():
+    args = parse_args()
+    api_key = get_api_key(args)
+    if args.context_cache and args.backend != "gemini":
+        print("ERROR: --context-cache needs --backend=gemini (the Edge Functions build their own prompts).")
+        sys.exit(1)
+    lessons = load_curriculum(args.curriculum)
+    journal = JobJournal(journal_path(OUT_DIR))
+    resume = journal.unfinished() if args.resume else None
+    if resume == []:
+        print("Nothing to resume: every cloud of the last run succeeded.")
+        return 0
+    targets = [lesson for lesson in lessons if lesson.generate and (not args.clouds or lesson.cloud in args.clouds)
+               and (resume is None or str(lesson.cloud) in resume)]
+    priors = {lesson.cloud: prior_context(lessons, lesson.cloud, args.prior_budget or None) for lesson in targets}
+    backend = Backend(args.backend, args.base_url, args.functions_url, get_functions_auth(args))
+    if args.avoid and not args.prompt_report:
+        _, added = update_avoid(OUT_DIR, near_duplicates(course_passages(OUT_DIR)))
+        print(f"Near-duplicates: {added} new text(s) for avoid.json")
+    avoids = load_avoid(OUT_DIR)
+    if args.prompt_report:
+        if args.count_tokens and not api_key:
+            print("ERROR: --count-tokens needs GEMINI_API_KEY or --key.")
+            sys.exit(1)
+        counter = make_client(args, api_key) if args.count_tokens else None
+        measure = (lambda text: counter.count_tokens(text, on_retry=log_retry)) if counter else estimate_tokens
+        print_prompt_report(section_tokens(backend, targets, priors, measure, avoids), args.count_tokens)
+        return
+    if args.backend == "gemini" and not api_key:
+        print("ERROR: Set GEMINI_API_KEY or pass --key=YOUR_KEY. Get key from https://aistudio.google.com/app/apikey")
+        sys.exit(1)
+    if args.backend != "gemini" and not backend.functions_auth:
+        print('ERROR: Set SUPABASE_FUNCTIONS_AUTH or pass --functions-auth="Bearer <anon key>" for the Edge Functions.')
+        sys.exit(1)
+    if args.stream and args.backend != "gemini":
+        print("ERROR: --stream needs --backend=gemini (the Edge Functions return whole responses).")
+        sys.exit(1)
+    if args.candidates > 1 and (args.stream or args.no_repair):
+        print("ERROR: --candidates scores whole lessons with lesson_repair; drop --stream and --no-repair.")
+        sys.exit(1)
+    if args.profile or args.trace:
+        pipeline_trace.start()
+    os.makedirs(OUT_DIR, exist_ok=True)
+    workers = max(1, args.concurrency)
+    client = make_client(args, api_key)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    manifest = load_manifest(OUT_DIR)
+    bodies = {}
+    for lesson in targets:
+        with span("prompt", cloud=lesson.cloud) as counts:
+            bodies[lesson.cloud] = backend.request_body(lesson, priors[lesson.cloud], avoids.get(lesson.cloud, ()))
+            counts["tokens_in"] = estimate_tokens(bodies[lesson.cloud])
+    sizes = section_tokens(backend, targets, priors, avoids=avoids)
+    if sizes:
+        per_cloud = [sum(v.values()) - v["instructions"] for v in sizes.values()]
+        print(f"Prompt size (est.): {max(v['instructions'] for v in sizes.values())} tokens of shared instructions "
+              f"+ {min(per_cloud)}-{max(per_cloud)} per cloud")
+    fingerprints = {cloud: input_fingerprint(backend, body, args.candidates) for cloud, body in bodies.items()}
+    quiz_items = {lesson.cloud: lesson.quiz_items for lesson in targets}
+    units = {lesson.cloud: lesson.unit for lesson in lessons}
+    vocab = None if args.no_repair else updated_vocabulary(OUT_DIR, units=units)
+    timings = {}
+    retries = {}
+    errors = {}
+    skipped = set()
+    started = time.monotonic()
+    if resume:
+        print(f"Resuming run {journal.last['run']}: {len(bodies)} cloud(s) left")
+    for cloud in bodies:
+        # Resumed clouds did not finish, so they run even if an older output is up to date.
+        if not (args.force or resume) and output_up_to_date(manifest, cloud, fingerprints[cloud], output_path(cloud)):
+            skipped.add(cloud)
+            print(f"cloud {cloud} up to date, skipping")
+    journal.start_run([str(cloud) for cloud in bodies], resumes=journal.last["run"] if resume else None)
+    for cloud in skipped:
+        journal.succeed(str(cloud), cloud_entry(manifest, cloud)["output"], skipped=True)
+    if args.context_cache and len(skipped) < len(bodies):
+        try:
+            backend.cached_content = client.create_cached_content(GEMINI_INSTRUCTIONS, args.context_cache_ttl,
+                                                                  on_retry=log_retry)
+            print(f"Cached shared instructions as {backend.cached_content} for {args.context_cache_ttl}s")
+        except GeminiError as e:
+            print(f"WARN: context cache unavailable, sending instructions inline ({e})")
+
+    stop = threading.Event()  # set on quota exhaustion or Ctrl-C; clouds not yet started stay pending
+
+    def run_job(cloud, body):
+        if stop.is_set():
+            raise CancelledError()
+        journal.start(str(cloud), inputs=fingerprints[cloud])
         try:
-            raw = call_gemini(prompt)
-            obj = extract_json(raw)
-            obj["quiz"] = [
-                {**q, "correct_index": q.get("correct_index", q.get("correctIndex", 0))}
-                for q in obj.get("quiz", [])
-            ]
-            with open(f"scripts/generated/cloud{cloud}.json", "w", encoding="utf-8") as f:
-                json.dump(obj, f, ensure_ascii=False, indent=2)
-            print(f"  Saved cloud{cloud}.json")
-        except Exception as e:
-            print(f"  ERROR cloud {cloud}: {e}")
-    print("Done. Check scripts/generated/")
+            return generate_cloud(cloud, body, backend, client, cache, args.refresh, args.stream,
+                                  not args.no_repair, vocab, args.candidates, quiz_items[cloud])
+        except GeminiError as e:
+            if e.status == 429:
+                stop.set()
+            raise
+
+    interrupted = quota_exhausted = False
+    # Each worker writes its cloudN.json as soon as its response arrives.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for cloud, body in bodies.items():
+            if cloud in skipped:
+                continue
+            print(f"Calling {backend.name} for cloud {cloud}...")
+            futures[pool.submit(run_job, cloud, body)] = cloud
+        try:
+            for fut in as_completed(futures):
+                cloud = futures[fut]
+                if fut.cancelled():
+                    continue
+                try:
+                    timings[cloud], retries[cloud], report = fut.result()
+                    entry = cloud_entry(manifest, cloud)
+                    entry["inputs"] = fingerprints[cloud]
+                    entry["output"] = file_sha256(output_path(cloud))
+                    if report is not None:
+                        entry["repair"] = {"fixes": len(report["fixes"]), "errors": report["errors"]}
+                    if report and "candidates" in report:
+                        entry["candidates"] = [s and s["penalty"] for s in report["candidates"]]
+                        entry["chosen"] = report["chosen"]
+                    save_manifest(OUT_DIR, manifest)
+                    journal.succeed(str(cloud), entry["output"], retries=retries[cloud])
+                    if vocab:
+                        # Later clouds still in flight can already draw distractors from this one.
+                        vocab.add_file(cloud, output_path(cloud), units.get(cloud))
+                    fixed = f", {len(report['fixes'])} fixes" if report else ""
+                    print(f"  Saved cloud{cloud}.json ({timings[cloud]:.1f}s, {retries[cloud]} retries{fixed})")
+                    if report and "candidates" in report:
+                        penalties = "/".join("-" if s is None else str(s["penalty"]) for s in report["candidates"])
+                        print(f"    best of {len(report['candidates'])}: penalties {penalties} -> "
+                              f"#{report['chosen'] + 1}")
+                    for e in (report or {}).get("errors", []):
+                        print(f"    WARN quiz item {e['item']}: {e['error']}")
+                except CancelledError:
+                    continue  # not started: quota ran out or Ctrl-C
+                except Exception as e:
+                    errors[cloud] = e
+                    retries[cloud] = getattr(e, "retries", 0)
+                    journal.fail(str(cloud), str(e), status=getattr(e, "status", None), retries=retries[cloud])
+                    print(f"  ERROR cloud {cloud}: {e}")
+                    if getattr(e, "status", None) == 429 and not quota_exhausted:
+                        # Out of quota: the queued clouds would only burn their retries too.
+                        # run_job() already stops clouds that have not started; this drops the queue.
+                        quota_exhausted = True
+                        for f in futures:
+                            f.cancel()
+        except KeyboardInterrupt:
+            interrupted = True
+            stop.set()
+            for f in futures:
+                f.cancel()
+            print("\nInterrupted; waiting for the requests in flight (their clouds stay unfinished)")
+    total = time.monotonic() - started
+    if quota_exhausted:
+        queued = sum(1 for cloud in futures.values() if cloud not in timings and cloud not in errors)
+        print(f"  Quota exhausted; {queued} queued cloud(s) left pending")
+    if vocab:
+        save_vocabulary(OUT_DIR, vocab)
+
+    print(f"\nTiming ({backend.name}, concurrency={workers}):")
+    for cloud in bodies:
+        if cloud in timings:
+            print(f"  cloud {cloud:>3}: {timings[cloud]:6.1f}s  retries={retries[cloud]}")
+        elif cloud in skipped:
+            print(f"  cloud {cloud:>3}: up to date")
+        elif cloud in errors:
+            print(f"  cloud {cloud:>3}:  error  retries={retries.get(cloud, 0)}")
+        else:
+            print(f"  cloud {cloud:>3}:  not run")
+    busy = sum(timings.values())
+    print(f"  total: {total:.1f}s wall, {busy:.1f}s summed over {len(timings)} ok / {len(errors)} failed / {len(skipped)} up to date")
+    print(f"  retries: {sum(retries.values())} total")
+    if cache:
+        print(f"  cache: {cache.hits} hit(s), {cache.misses} miss(es) in {cache.directory}")
+    pipeline_trace.finish(args.trace, args.profile)
+    left = journal.unfinished()
+    if left or interrupted:
+        print(f"Unfinished: cloud(s) {', '.join(left)}. Run again with --resume to generate only those.")
+        return 1
+    print(f"Done. Check {OUT_DIR}/")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
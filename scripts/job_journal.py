@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Append-only job journal for long batch runs (scripts/generated/journal.jsonl).
+
+Every state change of a job is one JSON line, flushed and fsynced before the
+work goes on:
+  {"run": ..., "jobs": [...], "resumes": ...}                     a run starts
+  {"run": ..., "job": "7", "state": "pending"}                    queued
+  {"run": ..., "job": "7", "state": "in_flight", "attempt": 2, "inputs": ...}
+  {"run": ..., "job": "7", "state": "succeeded", "output": sha256}
+  {"run": ..., "job": "7", "state": "failed", "error": ..., "status": 429}
+Replaying the lines gives each job's latest state, so after a crash, a quota
+exhaustion or Ctrl-C the jobs of the last run that did not succeed are exactly
+the work left (a job still "in_flight" was interrupted). A torn last line from
+a crash is ignored. "attempt" counts tries since the job last succeeded.
+
+generate_units_gemini.py writes the journal on every run; --resume runs only
+the last run's unfinished clouds. Show the last run:
+  python3 scripts/job_journal.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+GEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generated")
+JOURNAL_NAME = "journal.jsonl"
+STATES = ("pending", "in_flight", "succeeded", "failed")
+COMPACT_LINES = 20000  # rewrite the journal with only the last run once it grows past this
+
+
+def journal_path(gen_dir: str) -> str:
+    return os.path.join(gen_dir, JOURNAL_NAME)
+
+
+class JobJournal:
+    """The journal at `path`, replayed on open and appended to by each state change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last = None  # the most recent run line
+        self.jobs = {}    # job -> its latest state line
+        if self._load() > COMPACT_LINES:
+            self._compact()
+
+    def _load(self) -> int:
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(event)
+                    lines += 1
+        except FileNotFoundError:
+            pass
+        return lines
+
+    def _apply(self, event: dict) -> None:
+        if "jobs" in event:
+            self.last = event
+        elif event.get("job") is not None:
+            self.jobs[event["job"]] = event
+
+    def _compact(self) -> None:
+        if not self.last:
+            return
+        lines = [self.last] + [self.jobs[job] for job in self.last["jobs"] if job in self.jobs]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for event in lines:
+                f.write(json.dumps(event, ensure_ascii=False, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
+
+    def _append(self, event: dict) -> dict:
+        event["time"] = round(time.time(), 3)
+        line = json.dumps(event, ensure_ascii=False, sort_keys=True) + "\n"
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(event)
+        return event
+
+    def start_run(self, jobs: list, resumes=None) -> str:
+        """Record a new run of `jobs` (all pending). Returns its id."""
+        run = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+        self._append({"run": run, "jobs": list(jobs), "resumes": resumes})
+        for job in jobs:
+            self._append({"run": run, "job": job, "state": "pending", "attempt": self._attempts(job)})
+        return run
+
+    def _attempts(self, job: str) -> int:
+        """Tries since the job last succeeded."""
+        previous = self.jobs.get(job, {})
+        return 0 if previous.get("state") == "succeeded" else previous.get("attempt", 0)
+
+    def start(self, job: str, **fields) -> int:
+        """Mark `job` in flight. Returns its attempt number."""
+        attempt = self._attempts(job) + 1
+        self._append({"run": self.last["run"], "job": job, "state": "in_flight", "attempt": attempt, **fields})
+        return attempt
+
+    def succeed(self, job: str, output, **fields) -> None:
+        self._finish(job, "succeeded", output=output, **fields)
+
+    def fail(self, job: str, error: str, **fields) -> None:
+        self._finish(job, "failed", error=error, **fields)
+
+    def _finish(self, job: str, state: str, **fields) -> None:
+        attempt = self.jobs.get(job, {}).get("attempt", 0)
+        self._append({"run": self.last["run"], "job": job, "state": state, "attempt": attempt, **fields})
+
+    def state(self, job: str) -> str:
+        return self.jobs.get(job, {}).get("state", "pending")
+
+    def unfinished(self) -> list:
+        """Jobs of the last run that have not succeeded, in the run's order."""
+        if not self.last:
+            return []
+        return [job for job in self.last["jobs"] if self.state(job) != "succeeded"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=journal_path(GEN_DIR),
+                        help="Journal file (default: scripts/generated/journal.jsonl)")
+    args = parser.parse_args()
+    journal = JobJournal(args.path)
+    if not journal.last:
+        print(f"No runs in {args.path}")
+        return 0
+    run = journal.last
+    counts = {state: 0 for state in STATES}
+    for job in run["jobs"]:
+        counts[journal.state(job)] += 1
+    resumed = f", resuming {run['resumes']}" if run.get("resumes") else ""
+    print(f"Run {run['run']} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['time']))}{resumed}): "
+          + ", ".join(f"{n} {state}" for state, n in counts.items() if n))
+    for job in journal.unfinished():
+        event = journal.jobs.get(job, {})
+        error = f": {event['error']}" if event.get("error") else ""
+        print(f"  {job:>4}  {journal.state(job):<9} attempt {event.get('attempt', 0)}{error}")
+    return 1 if journal.unfinished() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
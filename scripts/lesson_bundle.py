@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Versioned binary bundle of lesson content, read by GeneratedLessonBundle.swift.
+
+Layout (integers big-endian):
+  4 bytes   magic "OYLB"
+  2 bytes   format version
+  4 bytes   index length N
+  N bytes   index: minified JSON
+            {"version": 1, "encoding": "deflate", "lessons": {"en": {"5": [offset, length], ...}, "ru": {...}}}
+  ...       payload: one minified JSON object per lesson, back to back
+
+Each payload object uses GeneratedLessonContent's Codable keys, so the app
+decodes a single cloud with JSONDecoder from its [offset, length] slice and never
+parses the rest of the file. With encoding "deflate" each slice is raw DEFLATE
+(what NSData.decompressed(using: .zlib) expects); "json" stores it as is.
+"""
+
+import json
+import struct
+import zlib
+from typing import Dict
+
+MAGIC = b"OYLB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">4sHI")
+
+
+def _minify(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _deflate(data: bytes) -> bytes:
+    c = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return c.compress(data) + c.flush()
+
+
+def build_bundle(lessons: Dict[str, Dict[int, dict]], compress: bool = True) -> bytes:
+    """lessons: {lang: {cloud: lesson dict}} -> bundle bytes."""
+    index = {}
+    blobs = []
+    offset = 0
+    for lang in sorted(lessons):
+        entries = index.setdefault(lang, {})
+        for cloud in sorted(lessons[lang]):
+            blob = _minify(lessons[lang][cloud])
+            if compress:
+                blob = _deflate(blob)
+            entries[str(cloud)] = [offset, len(blob)]
+            blobs.append(blob)
+            offset += len(blob)
+    encoding = "deflate" if compress else "json"
+    index_bytes = _minify({"version": FORMAT_VERSION, "encoding": encoding, "lessons": index})
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(index_bytes)) + index_bytes + b"".join(blobs)
+
+
+def read_index(data: bytes):
+    """Returns (index dict, payload start offset)."""
+    magic, version, index_len = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a lesson bundle")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle version {version}")
+    start = HEADER.size
+    return json.loads(data[start:start + index_len].decode("utf-8")), start + index_len
+
+
+def read_lesson(data: bytes, lang: str, cloud: int) -> dict:
+    """Decode one lesson without touching the others (mirrors the Swift loader)."""
+    index, payload = read_index(data)
+    offset, length = index["lessons"][lang][str(cloud)]
+    blob = data[payload + offset:payload + offset + length]
+    if index.get("encoding") == "deflate":
+        blob = zlib.decompress(blob, -15)
+    return json.loads(blob.decode("utf-8"))
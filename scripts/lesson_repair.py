@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Validation and repair of generated lesson JSON before it is rendered to Swift.
+
+repair_lesson() walks the quiz once and applies every rule to each item in
+order: connect-by-sound / matching -> multiple choice, fill-in-the-blank
+format, true/false options, minimum option count, question fallback,
+placeholder removal and option de-duplication. Each change is recorded in a
+report ({"item", "rule", "detail"}), and items that are still unusable
+afterwards are listed under "errors". score_lesson() turns a report into one
+penalty, so the generator can keep the best of several candidate lessons.
+
+Distractors come from a DistractorIndex built once per lesson (answers, options
+and "Kazakh — English" examples), bucketed by script and keyed by normalized
+form. Given the course Vocabulary (vocabulary.py) and the lesson's cloud, it
+prefers same-category items already taught by that lesson.
+
+Used by apply_generated_to_swift.py and generate_units_gemini.py. Run alone to
+check generated files:
+  python3 scripts/lesson_repair.py scripts/generated/cloud*.json
+  python3 scripts/lesson_repair.py scripts/generated/cloud7.json --report /tmp/report.json
+  python3 scripts/lesson_repair.py scripts/generated/cloud*.json --no-vocabulary   # lesson-only distractors
+"""
+
+import argparse
+import copy
+import json
+import os
+import re
+import sys
+from typing import Optional
+
+from pipeline_trace import span
+from vocabulary import (GEN_DIR, Vocabulary, categorize, distractor_key, gloss_key, lesson_pairs, normalize_option,
+                        updated_vocabulary)
+
+# Valid syllable sets for Connect by sound (Unit 1 only) - app only supports these
+VALID_CONNECT_SYLLABLES = [{"Жү", "Мы", "сық", "рек"}, {"Мы", "Тү", "йе", "сық"}, {"Ал", "Сә", "мұрт", "біз"}]
+
+CONNECT_TYPES = ("connect_by_sound", "connect-by-sound")
+PLACEHOLDER = "—"
+# Cost of each repair rule when ranking candidate lessons (score_lesson): the more a
+# rule had to invent, the worse the item the model wrote.
+RULE_PENALTIES = {"dropped": 5, "yes_no_padding": 4, "correct_index_invalid": 3,
+                  "placeholder_options_removed": 2, "correct_answer_added": 2, "min_options": 2,
+                  "dedup_options": 1, "connect_to_mcq": 1, "matching_to_mcq": 1, "fill_in_blank_format": 1,
+                  "true_false_options": 1}
+ERROR_PENALTY = 10          # per problem left after repair
+# Fixes that only paper over a broken item (a generic stem for a missing or "?" question):
+# score_lesson counts them as errors.
+ERROR_RULES = ("question_fallback",)
+MISSING_FIELD_PENALTY = 20  # per empty title / explanation_slides / examples / quiz
+LESSON_FIELDS = ("title", "explanation_slides", "examples", "quiz")
+_KAZAKH_LETTERS = "әіңғүұқөһАӘБВГДЕЖЗИЙКЛМНОӨПРСТУҰҚФХҺЦЧШЩЫЭЮЯ"
+
+
+def looks_kazakh(s: str) -> bool:
+    return any(c in _KAZAKH_LETTERS for c in (s or ""))
+
+
+class DistractorIndex:
+    """Distractor candidates in first-seen order, one bucket per script.
+
+    Built once per lesson, so filling options for an item is a short scan of a
+    pre-deduplicated bucket instead of a rescan of the whole quiz. With a course
+    vocabulary, same-category items taught by `cloud` are offered before the
+    lesson's own candidates, and any other taught item after them.
+    """
+
+    def __init__(self, vocab: Optional[Vocabulary] = None, cloud: Optional[int] = None):
+        self.vocab = vocab
+        self.cloud = cloud
+        self.buckets = {True: [], False: []}  # looks_kazakh -> [text]
+        self.meanings = {}                    # distractor_key(kazakh) -> english, from this lesson
+        self._partners = {}                   # distractor_key of either side of a lesson pair -> the other side's
+        self._keys = {True: set(), False: set()}
+
+    def add(self, text, kazakh: Optional[bool] = None) -> None:
+        if not isinstance(text, str):
+            return
+        text = text.strip()
+        if not text or text == PLACEHOLDER:
+            return
+        bucket = looks_kazakh(text) if kazakh is None else kazakh
+        key = distractor_key(text)
+        if key and key not in self._keys[bucket]:
+            self._keys[bucket].add(key)
+            self.buckets[bucket].append(text)
+
+    def add_lesson(self, data: dict) -> "DistractorIndex":
+        """Index answers and options of every quiz item, then both halves of each example."""
+        for item in data.get("quiz", []):
+            if not isinstance(item, dict):
+                continue
+            self.add(item.get("correct_answer"))
+            for option in item.get("options", item.get("answers", [])) or []:
+                self.add(option)
+        for kazakh, english in lesson_pairs({"examples": data.get("examples", [])}):
+            self.add(kazakh, kazakh=True)
+            self.add(english, kazakh=False)
+        for kazakh, english in lesson_pairs(data):
+            self.meanings.setdefault(distractor_key(kazakh), english)
+            self._partners.setdefault(distractor_key(kazakh), distractor_key(english))
+            self._partners.setdefault(distractor_key(english), distractor_key(kazakh))
+        return self
+
+    def meaning(self, kazakh: str) -> Optional[str]:
+        """English for a Kazakh word or phrase, from this lesson or the course."""
+        found = self.meanings.get(distractor_key(kazakh))
+        if found is None and self.vocab:
+            found = self.vocab.meaning(kazakh)
+        return found
+
+    def category(self, text: str, kazakh: bool) -> str:
+        """Vocabulary category of `text`, or a guess from its shape when it is not in the course yet."""
+        entry = self.vocab.lookup(text) if self.vocab else None
+        if entry:
+            return entry.category
+        return categorize(text, "") if kazakh else categorize("", text)
+
+    def pick(self, want_kazakh: bool, exclude=(), limit: int = 4, category: Optional[str] = None) -> list:
+        """Up to `limit` candidates of one script, skipping the texts in `exclude`, their
+        translations, and other wordings of the same gloss."""
+        skip = {gloss_key(e) for e in exclude}
+        out = []
+
+        def take(texts):
+            for text in texts:
+                if len(out) >= limit:
+                    return
+                key = gloss_key(text)
+                partner = self._partners.get(distractor_key(text))
+                if key not in skip and (partner is None or gloss_key(partner) not in skip):
+                    skip.add(key)
+                    out.append(text)
+
+        if self.vocab and category:
+            take(self.vocab.pick(want_kazakh, skip, limit, category, self.cloud))
+        take(self.buckets[want_kazakh])
+        if self.vocab:
+            take(self.vocab.pick(want_kazakh, skip, limit - len(out), None, self.cloud))
+        return out
+
+
+def deduplicate_options(opts: list, correct_index: int):
+    """Remove duplicate/near-duplicate options. Returns (deduped_opts, new_correct_index)."""
+    if not opts:
+        return opts, correct_index
+    seen = {}
+    out = []
+    for o in opts:
+        key = normalize_option(o)
+        if key and key not in seen:
+            seen[key] = len(out)
+            out.append(o)
+    if not out:
+        return opts, correct_index
+    # Remap correct_index if we removed the correct option's duplicate
+    correct_val = opts[correct_index] if 0 <= correct_index < len(opts) else opts[0]
+    new_idx = next((i for i, x in enumerate(out) if normalize_option(x) == normalize_option(correct_val)), 0)
+    return out, new_idx
+
+
+def _pairs_to_mcq(q: dict, kazakh: str, english: str, index: DistractorIndex) -> dict:
+    """"What does <kazakh> mean?" with the other pairs' meanings, then course distractors."""
+    opts = [english]
+    used = [kazakh]
+    for p in q.get("pairs", [])[1:]:
+        other = p.get("english", "")
+        if other and distractor_key(other) not in {distractor_key(o) for o in opts} and len(opts) < 4:
+            opts.append(other)
+            used.append(p.get("kazakh", ""))
+    opts += index.pick(want_kazakh=False, exclude=opts + used, limit=4 - len(opts),
+                       category=index.category(english, kazakh=False))
+    while len(opts) < 2:
+        opts.append(PLACEHOLDER)
+    return {
+        "question": f"What does {kazakh} mean?",
+        "options": opts[:4],
+        "correct_index": 0,
+        "points": q.get("points", 2),
+        "question_type": "multiple_choice",
+    }
+
+
+def convert_matching_to_mcq(q: dict, index: DistractorIndex) -> Optional[dict]:
+    """Convert matching question with pairs to MCQ. Never use Yes/No for matching."""
+    pairs = q.get("pairs", [])
+    if not pairs:
+        return None
+    kazakh = pairs[0].get("kazakh", "").strip()
+    english = pairs[0].get("english", "").strip()
+    if not kazakh or not english:
+        return None
+    return _pairs_to_mcq(q, kazakh, english, index)
+
+
+def convert_connect_to_mcq(q: dict, index: DistractorIndex) -> Optional[dict]:
+    """Convert connect_by_sound with pairs (no valid syllables) to multiple choice."""
+    pairs = q.get("pairs", [])
+    if pairs:
+        kazakh, english = pairs[0].get("kazakh", ""), pairs[0].get("english", "")
+    else:
+        m = re.search(r"Connect by sound:\s*(.+)", q.get("question", ""))
+        kazakh = (m.group(1).strip() if m else "").strip()
+        english = (index.meaning(kazakh) or "") if kazakh else ""
+    if not kazakh or not english:
+        return None
+    return _pairs_to_mcq(q, kazakh, english, index)
+
+
+def fix_fill_in_blank_question(q: dict) -> bool:
+    """Fix fill-in-the-blank format: X ... (Y) → X Y____ with endings as options. Returns True if changed."""
+    raw = q.get("question", "")
+    correct = q.get("correct_answer")
+    opts = q.get("options", q.get("answers", []))
+    # Pattern: "Мен ... (мұғалім)" with options like мұғаліммін, мұғалімсің → "Мен мұғалім____." + endings
+    m = re.search(r"^(.+?)\s+\.\.\.\s+\(([^)]+)\)\s*$", raw)
+    if not (m and opts and (isinstance(correct, str) or correct is None)):
+        return False
+    prefix, word = m.group(1).strip(), m.group(2).strip()
+    q["question"] = f"Complete the sentence: {prefix} {word}____."
+    # Extract endings: мұғаліммін → мін, мұғалімсің → сің
+    endings = []
+    for o in opts:
+        if isinstance(o, str) and word and o.startswith(word):
+            endings.append(o[len(word):].strip())
+        else:
+            endings.append(o)
+    if len(endings) >= 2 and all(isinstance(e, str) and len(e) <= 6 for e in endings):
+        q["options"] = endings
+        ci = q.get("correct_index", q.get("correctIndex", 0))
+        if 0 <= ci < len(opts) and opts[ci].startswith(word):
+            ending = opts[ci][len(word):].strip()
+            q["correct_index"] = endings.index(ending) if ending in endings else 0
+    return True
+
+
+def ensure_min_options(q: dict, index: DistractorIndex) -> bool:
+    """Give translate / fill-in items with a correct_answer at least 3 options. Returns True if changed."""
+    opts = q.get("options", q.get("answers"))
+    if opts and len(opts) >= 3:
+        return False
+    correct = q.get("correct_answer")
+    if not isinstance(correct, str):
+        return False
+    correct = correct.strip()
+    qtype = q.get("question_type", "")
+    if qtype.startswith("translate_to_kazakh") or qtype == "fill_in_the_blank":
+        want_kazakh = True
+    elif qtype.startswith("translate_to_english"):
+        want_kazakh = False
+    else:
+        return False
+    prompt = q.get("text")
+    exclude = [correct, prompt] if isinstance(prompt, str) else [correct]
+    new_opts = [correct] + index.pick(want_kazakh, exclude=exclude, limit=3,
+                                      category=index.category(correct, want_kazakh))
+    if len(new_opts) < 3:
+        return False
+    q["options"] = new_opts
+    q["correct_index"] = 0
+    return True
+
+
+def fallback_question(q: dict) -> str:
+    """A question for items whose "question" is missing or just "?"."""
+    text = q.get("text", "")
+    qtype = q.get("question_type", "")
+    if qtype == "translate_to_kazakh" and text:
+        return f"Translate to Kazakh: {text}"
+    if qtype == "translate_to_english" and text:
+        return f"What does {text} mean?"
+    if qtype == "fill_in_the_blank" and text:
+        return f"Fill in the blank: {text}"
+    if qtype in CONNECT_TYPES:
+        pairs = q.get("pairs", [])
+        k = pairs[0].get("kazakh", "") if pairs else ""
+        return f"Connect by sound: {k}" if k else "Connect by sound"
+    question = q.get("question")
+    return question if not bad_question(question) else "Choose the correct answer"
+
+
+def bad_question(question) -> bool:
+    """True if a question stem is missing, empty or just "?"."""
+    return not isinstance(question, str) or question.strip() in ("", "?")
+
+
+def finalize_item(q: dict, fix) -> dict:
+    """Settle question, options and correct_index into the form the Swift renderer writes out."""
+    raw_q = q.get("question")
+    if bad_question(raw_q):
+        q["question"] = fallback_question(q)
+        if q["question"] != raw_q:
+            fix("question_fallback", q["question"])
+    opts = q.get("options", q.get("answers"))
+    correct = q.get("correct_answer")
+    if opts is None or len(opts) < 3:
+        qtype = q.get("question_type", "")
+        if (qtype.startswith("translate") or qtype == "fill_in_the_blank") and isinstance(correct, str):
+            opts = opts or [correct]
+        else:
+            opts = opts or ["Yes", "No"]
+    kept = [o for o in opts if o and str(o).strip() != PLACEHOLDER]
+    if len(kept) != len(opts):
+        fix("placeholder_options_removed", f"{len(opts) - len(kept)} removed")
+    opts = kept
+    if len(opts) < 3 and correct and correct not in opts:
+        opts = [correct] + [o for o in opts if o != correct]
+        fix("correct_answer_added", str(correct))
+    correct_index = q.get("correct_index", q.get("correctIndex", 0))
+    if not isinstance(correct_index, int) or isinstance(correct_index, bool):
+        fix("correct_index_invalid", repr(correct_index))
+        correct_index = 0
+    deduped, correct_index = deduplicate_options(opts, correct_index)
+    if len(deduped) != len(opts):
+        fix("dedup_options", f"{len(opts)} -> {len(deduped)}")
+    opts = deduped
+    if len(opts) < 2:
+        opts = opts + ["Yes", "No"][: 3 - len(opts)]
+        fix("yes_no_padding", f"{len(opts)} options")
+    q["options"] = opts
+    q.pop("answers", None)
+    q["correct_index"] = correct_index
+    return q
+
+
+def item_errors(q: dict) -> list:
+    """Problems left after repair that the app will show as-is."""
+    errors = []
+    if bad_question(q.get("question")):
+        errors.append(f"question {q.get('question')!r}")
+    if q.get("question_type") in CONNECT_TYPES and not q.get("pairs"):
+        errors.append("connect item without pairs")
+    opts = q.get("options") or []
+    if not 0 <= q.get("correct_index", 0) < max(len(opts), 1):
+        errors.append(f"correct_index {q.get('correct_index')} out of range")
+    if q.get("question_type") not in ("listening", "true_false") and len(opts) < 3:
+        errors.append(f"only {len(opts)} options")
+    if len({normalize_option(o) for o in opts}) != len(opts):
+        errors.append("duplicate options")
+    return errors
+
+
+def repair_lesson(data: dict, vocab: Optional[Vocabulary] = None, cloud: Optional[int] = None):
+    """Repair a lesson in one pass over its quiz. Returns (repaired copy, report).
+
+    With `vocab`, distractors may come from anything the course taught up to `cloud`.
+
+    report = {"fixes": [{"item", "rule", "detail"}], "errors": [{"item", "error"}],
+              "items_in": n, "items_out": m}
+    where "item" is the position in the input quiz.
+    """
+    with span("repair", cloud=cloud) as counts:
+        data, report = _repair(data, vocab, cloud)
+        counts.update(items_in=report["items_in"], items_out=report["items_out"],
+                      fixes=len(report["fixes"]), errors=len(report["errors"]))
+    return data, report
+
+
+def _repair(data: dict, vocab: Optional[Vocabulary], cloud: Optional[int]):
+    data = copy.deepcopy(data)
+    quiz_raw = data.get("quiz", [])
+    index = DistractorIndex(vocab, cloud).add_lesson(data)
+    fixes = []
+    errors = []
+    quiz = []
+    sources = []  # input position of each output item, for the report
+    for i, q in enumerate(quiz_raw):
+        def fix(rule, detail=""):
+            fixes.append({"item": i, "rule": rule, "detail": detail})
+
+        if not isinstance(q, dict):
+            fix("dropped", "not an object")
+            continue
+        qtype = q.get("question_type", "")
+        if qtype in CONNECT_TYPES:
+            opts = q.get("options", q.get("answers", []))
+            opt_set = set(str(o) for o in opts) if opts else set()
+            if opt_set not in VALID_CONNECT_SYLLABLES:
+                q = convert_connect_to_mcq(q, index)
+                if q is None:
+                    fix("dropped", "connect_by_sound without pairs or known phrase")
+                    continue
+                fix("connect_to_mcq", q["question"])
+                quiz.append(finalize_item(q, fix))
+                sources.append(i)
+                continue
+        if qtype == "matching":
+            q = convert_matching_to_mcq(q, index)
+            if q is None:
+                fix("dropped", "matching without pairs")
+                continue
+            fix("matching_to_mcq", q["question"])
+            quiz.append(finalize_item(q, fix))
+            sources.append(i)
+            continue
+        if qtype in ("fill_in_the_blank", "multiple_choice") and fix_fill_in_blank_question(q):
+            fix("fill_in_blank_format", q["question"])
+        if qtype == "true_false":
+            q["correct_index"] = 1 if q.get("correct_answer") is False else 0
+            # Any two options are kept, so translated lessons keep their own Yes/No.
+            if not (isinstance(q.get("options"), list) and len(q["options"]) == 2):
+                q["options"] = ["Yes", "No"]
+                fix("true_false_options")
+        if ensure_min_options(q, index):
+            fix("min_options", f"{len(q['options'])} options")
+        quiz.append(finalize_item(q, fix))
+        sources.append(i)
+    for i, q in zip(sources, quiz):
+        errors.extend({"item": i, "error": e} for e in item_errors(q))
+    data["quiz"] = quiz
+    report = {"fixes": fixes, "errors": errors, "items_in": len(quiz_raw), "items_out": len(quiz)}
+    return data, report
+
+
+def quiz_length_range(quiz_items) -> Optional[tuple]:
+    """(low, high) from a curriculum quiz_items value such as "8-10" or "9"."""
+    m = re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+))?\s*", str(quiz_items or ""))
+    if not m:
+        return None
+    return int(m.group(1)), int(m.group(2) or m.group(1))
+
+
+def score_lesson(data: dict, report: dict, quiz_items=None) -> dict:
+    """Penalty for a lesson as generated, from its repair_lesson() report (lower is better).
+
+    Each fix costs RULE_PENALTIES[rule], each remaining error or ERROR_RULES fix
+    ERROR_PENALTY, each empty top-level field MISSING_FIELD_PENALTY, and each quiz
+    item outside `quiz_items` 2.
+    """
+    rules = {}
+    for f in report["fixes"]:
+        rules[f["rule"]] = rules.get(f["rule"], 0) + 1
+    missing = [k for k in LESSON_FIELDS if not data.get(k)]
+    errors = len(report["errors"]) + sum(rules.get(rule, 0) for rule in ERROR_RULES)
+    penalty = sum(RULE_PENALTIES.get(rule, 1) * n for rule, n in rules.items() if rule not in ERROR_RULES)
+    penalty += ERROR_PENALTY * errors + MISSING_FIELD_PENALTY * len(missing)
+    bounds = quiz_length_range(quiz_items)
+    if bounds:
+        n = report["items_out"]
+        penalty += 2 * (max(0, bounds[0] - n) + max(0, n - bounds[1]))
+    return {"penalty": penalty, "fixes": len(report["fixes"]), "errors": errors,
+            "items": report["items_out"], "rules": rules, "missing": missing}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="Lesson JSON files (e.g. scripts/generated/cloud*.json)")
+    parser.add_argument("--report", help="Write the combined report here as JSON")
+    parser.add_argument("--write", action="store_true", help="Overwrite each file with its repaired version")
+    parser.add_argument("--no-vocabulary", action="store_true",
+                        help="Only use each lesson's own content for distractors, not the course vocabulary")
+    args = parser.parse_args()
+
+    vocab = None if args.no_vocabulary or not os.path.isdir(GEN_DIR) else updated_vocabulary(GEN_DIR)
+    combined = {}
+    error_count = 0
+    for path in args.paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        m = re.fullmatch(r"cloud(\d+)\.json", os.path.basename(path))
+        repaired, report = repair_lesson(data, vocab, int(m.group(1)) if m else None)
+        combined[path] = report
+        error_count += len(report["errors"])
+        print(f"{path}: {report['items_in']} -> {report['items_out']} items, "
+              f"{len(report['fixes'])} fixes, {len(report['errors'])} errors, "
+              f"penalty {score_lesson(data, report)['penalty']}")
+        for e in report["errors"]:
+            print(f"  item {e['item']}: {e['error']}")
+        if args.write:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(repaired, f, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(combined, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    return 1 if error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
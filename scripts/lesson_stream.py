@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Incremental parser for lesson JSON arriving in pieces (streamGenerateContent).
+
+feed() takes text chunks as they stream in and reports each quiz item the moment
+its closing brace arrives, and each other top-level field (title,
+explanation_slides, examples) once its value is complete. Code fences or prose
+before the first "{" are ignored. If the stream stops early (e.g. at
+maxOutputTokens) everything completed so far is kept, so only the missing tail
+has to be requested again.
+"""
+
+import bisect
+import json
+from typing import Optional
+
+LESSON_FIELDS = ("title", "explanation_slides", "examples", "quiz")
+
+
+def normalize_quiz_item(q: dict) -> dict:
+    """Same correct_index normalization generate_cloud() applies to whole responses."""
+    return {**q, "correct_index": q.get("correct_index", q.get("correctIndex", 0))}
+
+
+def quiz_item_error(q) -> Optional[str]:
+    """Why a parsed quiz item is unusable, or None. Repairs are left to apply_generated_to_swift.py."""
+    if not isinstance(q, dict):
+        return "not an object"
+    if not isinstance(q.get("question"), str) or not q["question"].strip():
+        return "missing question"
+    options = q.get("options", q.get("answers"))
+    if options is None and not q.get("pairs"):
+        return "no options or pairs"
+    if options is not None and (not isinstance(options, list) or not options):
+        return "options is not a non-empty list"
+    index = q.get("correct_index", q.get("correctIndex", 0))
+    if not isinstance(index, int) or isinstance(index, bool):
+        return "correct_index is not an integer"
+    if options and not 0 <= index < len(options):
+        return f"correct_index {index} out of range for {len(options)} options"
+    return None
+
+
+class LessonStreamParser:
+    """Scans streamed text once, character by character, keeping only string/nesting state."""
+
+    def __init__(self, on_item=None, on_field=None):
+        self.on_item = on_item      # called with each complete quiz item dict
+        self.on_field = on_field    # called with (name, value) for other top-level fields
+        self.buf = []               # chunks of text from the root "{" on
+        self._starts = []           # offset of each chunk in buf
+        self.length = 0
+        self.started = False
+        self.done = False
+        self.fields = {}
+        self.items = []
+        self.quiz_closed = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = "key"         # at depth 1: expecting a "key", or a "value"
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._item_start = None
+
+    def text(self) -> str:
+        return "".join(self.buf)
+
+    def _slice(self, start: int, end: int) -> str:
+        """text()[start:end], joining only the chunks that overlap it."""
+        first = bisect.bisect_right(self._starts, start) - 1
+        last = bisect.bisect_left(self._starts, end)
+        joined = "".join(self.buf[first:last])
+        base = self._starts[first]
+        return joined[start - base:end - base]
+
+    def _finish_value(self, end: int) -> None:
+        start, self._value_start = self._value_start, None
+        if self._key == "quiz":
+            self.quiz_closed = True
+            return
+        if self._key is None:
+            return
+        try:
+            value = json.loads(self._slice(start, end))
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        if self.on_field:
+            self.on_field(self._key, value)
+
+    def _finish_item(self, end: int) -> None:
+        raw = self._slice(self._item_start, end)
+        self._item_start = None
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return
+        self.items.append(item)
+        if self.on_item:
+            self.on_item(item)
+
+    def feed(self, chunk: str) -> None:
+        if self.done:
+            return
+        if not self.started:
+            start = chunk.find("{")
+            if start < 0:
+                return
+            chunk = chunk[start:]
+            self.started = True
+        base = self.length
+        self.buf.append(chunk)
+        self._starts.append(base)
+        self.length += len(chunk)
+        for i, ch in enumerate(chunk):
+            pos = base + i
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "key":
+                        self._key = json.loads(self._slice(self._key_start, pos + 1))
+                    elif self._depth == 1 and self._value_start is not None:
+                        self._finish_value(pos + 1)
+                continue
+            if ch in " \t\r\n":
+                continue
+            if self._depth == 1:
+                if self._state == "key":
+                    if ch == '"':
+                        self._key_start = pos
+                        self._in_string = True
+                    elif ch == ":":
+                        self._state = "value"
+                    elif ch == "}":
+                        self._depth = 0
+                        self.done = True
+                        return
+                    continue
+                # value position at depth 1
+                if ch == ",":
+                    if self._value_start is not None:
+                        self._finish_value(pos)
+                    self._state = "key"
+                    continue
+                if ch == "}":
+                    if self._value_start is not None:
+                        self._finish_value(pos)
+                    self._depth = 0
+                    self.done = True
+                    return
+                if self._value_start is None:
+                    self._value_start = pos
+                if ch == '"':
+                    self._in_string = True
+                elif ch in "[{":
+                    self._depth += 1
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+                if ch == "{" and self._depth == 3 and self._key == "quiz":
+                    self._item_start = pos
+            elif ch in "]}":
+                self._depth -= 1
+                if ch == "}" and self._depth == 2 and self._item_start is not None:
+                    self._finish_item(pos + 1)
+                elif self._depth == 1 and self._value_start is not None:
+                    self._finish_value(pos + 1)
+
+    def feed_all(self, text: str) -> "LessonStreamParser":
+        self.feed(text)
+        return self
+
+    def missing_fields(self) -> list:
+        """Top-level lesson fields not (completely) received yet; "quiz" unless its array closed."""
+        missing = [f for f in LESSON_FIELDS if f != "quiz" and f not in self.fields]
+        if not self.quiz_closed:
+            missing.append("quiz")
+        return missing
+
+    def lesson(self) -> dict:
+        """Everything received so far as a lesson dict."""
+        return {**self.fields, "quiz": list(self.items)}
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generateContent endpoint, for benchmarks and offline runs.
+
+Answers POST /v1beta/models/<model>:generateContent with the same response shape
+the generator reads (candidates[0].content.parts[0].text + usageMetadata). The
+text is a synthetic lesson in the generator's JSON format, derived from a hash of
+the prompt so the same prompt always gets the same lesson; generationConfig
+candidateCount asks for several different ones, and --defect-rate spoils some
+quiz items so the generator's --candidates scoring has something to choose. Translation prompts
+from translate_lessons.py ("Strings:" followed by a JSON object) get every
+string back prefixed with "[ru] ", and continuation prompts for a cut-off lesson
+get the fields and quiz items that are still missing. POST /cachedContents stores a system
+instruction that later requests can reference with "cachedContent" (blocks
+under --cache-min-tokens are refused with 400, like the real minimum), and
+:countTokens answers with a chars/4 count. :streamGenerateContent
+answers with SSE events (?alt=sse) over chunked transfer. Paths ending in
+/gemini-generator and /generate-course-content mimic those Edge Functions, so
+--functions-url can point here too.
+
+Run:
+  python3 scripts/mock_gemini_server.py --port 8765 --latency 0.5 --jitter 0.2 --rate-429 0.1
+  python3 scripts/mock_gemini_server.py --truncate-rate 0.3   # cut responses short with finishReason MAX_TOKENS
+  python3 scripts/mock_gemini_server.py --defect-rate 0.3     # spoil some quiz items (try --candidates 3)
+  GEMINI_API_KEY=mock python3 scripts/generate_units_gemini.py --base-url=http://127.0.0.1:8765/v1beta
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_GREETINGS = [("Сәлем", "Hi!"), ("Сәлеметсіз бе", "Hello! (formal)"), ("Сау бол", "Goodbye! (informal)"),
+              ("Сау болыңыз", "Goodbye! (formal)"), ("Мұғалім", "Teacher"), ("Оқушы", "Student"),
+              ("Мен", "I"), ("Сен", "You (informal)"), ("Сыныптасы", "Classmate"), ("Дос", "Friend")]
+
+
+_CUT_OFF = "\n\nYour previous answer was cut off."
+_CONTINUATION = re.compile(r"kept as is:\n(.*)\n\nOutput ONLY a JSON object with the missing fields: ([^.]*)\.", re.S)
+
+
+def synthetic_lesson(prompt: str, quiz_items: int = 9, candidate: int = 0, defect_rate: float = 0.0) -> dict:
+    """Deterministic lesson JSON for a prompt, shaped like real Gemini output.
+
+    Each `candidate` index gets its own lesson; `defect_rate` of the multiple-choice
+    items are spoiled the way real output sometimes is (two options, a "?" stem, or
+    a duplicated option)."""
+    key = f"{prompt}\n#{candidate}" if candidate else prompt
+    seed = int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    m = re.search(r"Current lesson summary:\s*(.+)", prompt)
+    summary = (m.group(1).strip() if m else "Synthetic lesson")[:60]
+    pairs = rng.sample(_GREETINGS, 6)
+    quiz = [{
+        "question": "Listen and choose the correct word.",
+        "options": [k for k, _ in pairs[:4]],
+        "correct_index": 0,
+        "points": 1,
+        "question_type": "listening",
+        "audio_text": pairs[0][0],
+    }]
+    for i in range(quiz_items - 1):
+        k, e = pairs[i % len(pairs)]
+        others = [p[1] for p in pairs if p[0] != k][:3]
+        opts = [e] + others
+        rng.shuffle(opts)
+        quiz.append({
+            "question": f"What does {k} mean?",
+            "options": opts,
+            "correct_index": opts.index(e),
+            "points": 1,
+            "question_type": "multiple_choice",
+            "audio_text": None,
+        })
+    for q in quiz[1:]:
+        if rng.random() < defect_rate:
+            defect = rng.choice(("two_options", "question", "duplicate"))
+            if defect == "two_options":
+                q["options"] = [q["options"][q["correct_index"]], q["options"][q["correct_index"] - 1]]
+                q["correct_index"] = 0
+            elif defect == "question":
+                q["question"] = "?"
+            else:
+                q["options"][(q["correct_index"] + 1) % len(q["options"])] = q["options"][q["correct_index"]] + "!"
+    return {
+        "title": summary.split(":")[0],
+        "explanation_slides": [
+            f"**{pairs[0][0]}** means \"{pairs[0][1]}\".\n\nSynthetic slide for: {summary}.",
+            f"**{pairs[1][0]}** means \"{pairs[1][1]}\".\n\nPractice it with a friend.",
+        ],
+        "examples": [f"{k} — {e}" for k, e in pairs[:4]],
+        "quiz": quiz,
+    }
+
+
+def synthetic_continuation(prompt: str, defect_rate: float = 0.0):
+    """The missing part of the lesson a generate_units_gemini.continuation_prompt() asks
+    for (quiz items after the ones already received), or None for any other prompt."""
+    head, sep, tail = prompt.partition(_CUT_OFF)
+    m = _CONTINUATION.search(tail) if sep else None
+    if not m:
+        return None
+    kept = json.loads(m.group(1))
+    lesson = synthetic_lesson(head, defect_rate=defect_rate)
+    rest = {field: lesson[field] for field in (f.strip() for f in m.group(2).split(",")) if field in lesson}
+    if "quiz" in rest:
+        rest["quiz"] = lesson["quiz"][len(kept.get("quiz", [])):]
+    return rest
+
+
+def synthetic_translation(prompt: str):
+    """{id: "[ru] text"} for a translate_lessons.py prompt, or None for any other prompt."""
+    m = re.search(r"^Strings:\n(\{.*\})\s*$", prompt, re.S | re.M)
+    if not m:
+        return None
+    return {key: f"[ru] {text}" for key, text in json.loads(m.group(1)).items()}
+
+
+class MockGemini:
+    """Configuration and counters shared by the request handlers."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_429: float = 0.0, retry_after: float = 1.0, truncate_rate: float = 0.0,
+                 chunk_chars: int = 200, cache_min_tokens: int = 0, defect_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.truncate_rate = truncate_rate
+        self.chunk_chars = chunk_chars
+        self.cache_min_tokens = cache_min_tokens
+        self.defect_rate = defect_rate
+        self.cached = {}  # cachedContents name -> system instruction text
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "429": 0, "500": 0, "truncated": 0, "cached_tokens": 0}
+
+    def roll(self) -> float:
+        with self.lock:
+            self.counts["requests"] += 1
+            return self.rng.random()
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+    def cut(self, text: str):
+        """(text, finishReason): sometimes the text stops partway, as at maxOutputTokens."""
+        with self.lock:
+            truncate = self.rng.random() < self.truncate_rate
+            point = self.rng.randint(len(text) // 4, len(text) - 2) if truncate else len(text)
+        if not truncate:
+            return text, "STOP"
+        self.count("truncated")
+        return text[:point], "MAX_TOKENS"
+
+
+def make_handler(mock: MockGemini):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: dict = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_sse(self, events: list):
+            """Each event as a `data:` line, one HTTP chunk per event (like the real endpoint)."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event in events:
+                data = f"data: {json.dumps(event, ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": {"code": 400, "message": "Invalid JSON"}})
+            path = self.path.split("?")[0]
+            stream = path.endswith(":streamGenerateContent")
+            if path.endswith(":countTokens"):
+                parts = payload.get("contents", [{}])[0].get("parts", [{}])
+                return self._send(200, {"totalTokens": max(1, len(parts[0].get("text", "")) // 4)})
+            if path.endswith("/cachedContents"):
+                text = payload.get("systemInstruction", {}).get("parts", [{}])[0].get("text", "")
+                tokens = max(1, len(text) // 4)
+                if tokens < mock.cache_min_tokens:
+                    return self._send(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT", "message":
+                                      f"Cached content is too small: {tokens} < {mock.cache_min_tokens} tokens"}})
+                with mock.lock:
+                    name = f"cachedContents/mock-{len(mock.cached) + 1}"
+                    mock.cached[name] = text
+                return self._send(200, {"name": name, "model": payload.get("model"),
+                                        "usageMetadata": {"totalTokenCount": tokens}})
+            cached_text = ""
+            if payload.get("cachedContent"):
+                cached_text = mock.cached.get(payload["cachedContent"])
+                if cached_text is None:
+                    return self._send(404, {"error": {"code": 404, "message": "CachedContent not found"}})
+            if re.search(r"/models/[^/:]+:(stream)?[gG]enerateContent$", path):
+                parts = payload.get("contents", [{}])[0].get("parts", [{}])
+                prompt = parts[0].get("text", "") if parts else ""
+            elif path.endswith("/gemini-generator"):
+                prompt = payload.get("prompt", "")
+            elif path.endswith("/generate-course-content"):
+                prompt = f"Current lesson summary: {payload.get('unit_summary', '')}"
+            else:
+                return self._send(404, {"error": {"code": 404, "message": f"Unknown path {self.path}"}})
+
+            delay = max(0.0, mock.latency + (mock.rng.uniform(-mock.jitter, mock.jitter) if mock.jitter else 0.0))
+            roll = mock.roll()
+            if roll < mock.rate_429:
+                mock.count("429")
+                return self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                                  "message": "Mock quota exceeded"}},
+                                  {"Retry-After": str(int(mock.retry_after))})
+            if roll < mock.rate_429 + mock.error_rate:
+                mock.count("500")
+                return self._send(500, {"error": {"code": 500, "message": "Mock internal error"}})
+            if delay:
+                time.sleep(delay)
+
+            special = synthetic_translation(prompt)
+            if special is None:
+                special = synthetic_continuation(prompt, mock.defect_rate)
+            count = max(1, int(payload.get("generationConfig", {}).get("candidateCount", 1)))
+            lessons = [special] if special is not None else [
+                synthetic_lesson(prompt, candidate=i, defect_rate=mock.defect_rate) for i in range(count)]
+            mock.count("ok")
+            if path.endswith("/generate-course-content"):
+                return self._send(200, lessons[0])  # the Edge Function returns the lesson itself
+            answers = [mock.cut(json.dumps(lesson, ensure_ascii=False, indent=2)) for lesson in lessons]
+            text, finish = answers[0]
+            cached_tokens = len(cached_text) // 4
+            prompt_tokens = max(1, len(prompt) // 4) + cached_tokens
+            out_tokens = max(1, sum(len(t) for t, _ in answers) // 4)
+            usage = {"promptTokenCount": prompt_tokens, "candidatesTokenCount": out_tokens,
+                     "totalTokenCount": prompt_tokens + out_tokens}
+            if cached_tokens:
+                usage["cachedContentTokenCount"] = cached_tokens
+                with mock.lock:
+                    mock.counts["cached_tokens"] += cached_tokens
+            if not stream:
+                return self._send(200, {
+                    "candidates": [{"content": {"parts": [{"text": t}], "role": "model"}, "finishReason": f, "index": i}
+                                   for i, (t, f) in enumerate(answers)],
+                    "usageMetadata": usage,
+                })
+            size = max(1, mock.chunk_chars)
+            pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+            events = [{"candidates": [{"content": {"parts": [{"text": piece}], "role": "model"}}]} for piece in pieces]
+            events[-1]["candidates"][0]["finishReason"] = finish
+            events[-1]["usageMetadata"] = usage
+            self._send_sse(events)
+
+    return Handler
+
+
+def start_server(port: int = 0, host: str = "127.0.0.1", **options):
+    """Start in a daemon thread. Returns (server, mock, base_url)."""
+    mock = MockGemini(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, mock, f"http://{host}:{server.server_port}/v1beta"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every successful response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds around --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                        help="Fraction of responses cut short with finishReason MAX_TOKENS")
+    parser.add_argument("--chunk-chars", type=int, default=200, help="Characters per streamed SSE event")
+    parser.add_argument("--cache-min-tokens", type=int, default=0,
+                        help="Refuse /cachedContents blocks smaller than this (Gemini's minimum varies by model)")
+    parser.add_argument("--defect-rate", type=float, default=0.0,
+                        help="Fraction of multiple-choice items given two options, a \"?\" stem or a duplicate option")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, mock, base_url = start_server(
+        args.port, args.host, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_429=args.rate_429, retry_after=args.retry_after, truncate_rate=args.truncate_rate,
+        chunk_chars=args.chunk_chars, cache_min_tokens=args.cache_min_tokens, defect_rate=args.defect_rate,
+        seed=args.seed,
+    )
+    print(f"Mock Gemini listening on {base_url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served: {mock.counts}")
+
+
+if __name__ == "__main__":
+    main()
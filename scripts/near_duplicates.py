@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Course-wide near-duplicate detection for generated lessons (MinHash + LSH).
+
+Every quiz question (its stem together with its correct answer, so "What does
+Мен mean?" and "What does Сен mean?" stay apart) and every explanation slide
+of scripts/generated/cloud*.json, as lesson_repair leaves it for the app, is
+lower-cased, stripped of punctuation and **highlights**, and cut into character
+NGRAM-grams. One hash per n-gram fills a BANDS * ROWS MinHash signature
+(one-permutation hashing: each hash lands in one slot, which keeps the
+smallest), so signing a passage is linear in its length.
+Exact repeats are merged first. Passages whose signatures agree on all ROWS
+slots of any band share an LSH bucket; only those are compared exactly, and
+ones with a Jaccard similarity of at least THRESHOLD join the same group of
+near-duplicates. Questions whose stem the format rules prescribe (listening and
+connect-by-sound items) repeat by design and are left out.
+
+In each group, every cloud but the earliest is told to avoid the earliest
+cloud's question (with its answer) or slide. The lists are kept in
+scripts/generated/avoid.json, which only grows (at most MAX_AVOID per cloud), so
+a cloud's prompt stays the same once it has been regenerated without the repeat.
+generate_units_gemini.py adds each cloud's list to its prompt whenever
+avoid.json exists, and --avoid refreshes the file before generating, so only
+clouds with new repeats are regenerated.
+
+Run:
+  python3 scripts/near_duplicates.py                  # report near-duplicates
+  python3 scripts/near_duplicates.py --write          # and add them to avoid.json
+  python3 scripts/near_duplicates.py --threshold 0.5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+
+from lesson_repair import CONNECT_TYPES, repair_lesson
+from vocabulary import GEN_DIR, course_units, load_vocabulary
+
+NGRAM = 5
+BANDS, ROWS = 16, 4      # 64 slots; pairs above ~0.5 Jaccard usually share a bucket
+THRESHOLD = 0.7
+MAX_AVOID = 12           # per cloud, to keep the prompt short
+AVOID_CHARS = 160        # longer slides are cut
+AVOID_NAME = "avoid.json"
+AVOID_VERSION = 1
+HASH_MAX = (1 << 64) - 1
+_CLOUD_FILE = re.compile(r"cloud(\d+)\.json$")
+_NON_WORD = re.compile(r"[\W_]+")
+_TEMPLATE_STEM = re.compile(r"\s*connect by sound\b", re.I)
+
+
+@dataclass
+class Passage:
+    cloud: int
+    kind: str    # "question" or "slide"
+    index: int   # position in the quiz or in explanation_slides
+    text: str    # as the lesson shows it
+    key: str     # what is compared, and what a later cloud is asked to avoid
+
+    def label(self) -> str:
+        return f"cloud {self.cloud} {self.kind} {self.index + 1}"
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.replace("**", "").lower()).split())
+
+
+def shingles(text: str, n: int = NGRAM) -> set:
+    text = normalize(text)
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def signature(grams: set, slots: int = BANDS * ROWS) -> list:
+    """One-permutation MinHash: each n-gram's hash goes to slot hash % slots, which keeps
+    the smallest; empty slots borrow from the next filled one so short texts still fill
+    every band."""
+    sig = [None] * slots
+    for gram in grams:
+        h = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+        slot, value = h % slots, h // slots
+        if sig[slot] is None or value < sig[slot]:
+            sig[slot] = value
+    filled = [i for i, v in enumerate(sig) if v is not None]
+    if not filled:
+        return [HASH_MAX] * slots
+    for i in range(slots):
+        if sig[i] is None:
+            j = next((k for k in filled if k > i), filled[0])
+            sig[i] = (sig[j] + (j - i) % slots) & HASH_MAX
+    return sig
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def lesson_passages(cloud: int, data: dict) -> list:
+    found = []
+    for i, q in enumerate(data.get("quiz", [])):
+        if not isinstance(q, dict):
+            continue
+        stem = q.get("question") or q.get("text") or ""
+        if not isinstance(stem, str) or not stem.strip() or stem.strip() == "?":
+            continue
+        if q.get("question_type") in ("listening",) + CONNECT_TYPES or _TEMPLATE_STEM.match(stem):
+            continue
+        opts = q.get("options") or []
+        correct = q.get("correct_index", 0)
+        answer = opts[correct] if isinstance(correct, int) and 0 <= correct < len(opts) else q.get("correct_answer")
+        key = f"{stem} → {answer}" if isinstance(answer, str) else stem
+        found.append(Passage(cloud, "question", i, stem, key))
+    for i, slide in enumerate(data.get("explanation_slides", [])):
+        if isinstance(slide, str) and slide.strip():
+            found.append(Passage(cloud, "slide", i, slide, slide))
+    return found
+
+
+def course_passages(gen_dir: str = GEN_DIR) -> list:
+    """Passages of every English cloudN.json in `gen_dir` after lesson_repair, by cloud."""
+    clouds = []
+    for name in os.listdir(gen_dir) if os.path.isdir(gen_dir) else []:
+        m = _CLOUD_FILE.fullmatch(name)
+        if m:
+            clouds.append(int(m.group(1)))
+    vocab = load_vocabulary(gen_dir)
+    vocab.refresh(gen_dir, course_units())  # in memory only
+    found = []
+    for cloud in sorted(clouds):
+        try:
+            with open(os.path.join(gen_dir, f"cloud{cloud}.json"), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            print(f"WARN: cloud{cloud}.json is not valid JSON, skipped")
+            continue
+        found.extend(lesson_passages(cloud, repair_lesson(data, vocab, cloud)[0]))
+    return found
+
+
+def near_duplicates(passages: list, threshold: float = THRESHOLD, bands: int = BANDS, rows: int = ROWS) -> list:
+    """Groups of passages of the same kind linked by an n-gram Jaccard similarity of at
+    least `threshold`, each in `passages` order, largest group first.
+
+    Exact repeats are merged before hashing, and a bucket member is compared only with
+    the bucket's representatives (members that matched none before them), so a phrase
+    repeated with small changes in every cloud costs about one comparison per cloud."""
+    exact = {}
+    for i, p in enumerate(passages):
+        exact.setdefault((p.kind, normalize(p.key)), []).append(i)
+    keys = list(exact)
+    grams = [shingles(text) for _, text in keys]
+    parent = list(range(len(keys)))
+
+    def root(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    buckets = {}
+    for k, (kind, _) in enumerate(keys):
+        sig = signature(grams[k], bands * rows)
+        for band in range(bands):
+            buckets.setdefault((kind, band, tuple(sig[band * rows:(band + 1) * rows])), []).append(k)
+    for members in buckets.values():
+        # Each member joins the first earlier representative it matches, or becomes one.
+        reps = []
+        for k in members:
+            for r in reps:
+                a, b = root(r), root(k)
+                if a == b:
+                    break
+                if jaccard(grams[r], grams[k]) >= threshold:
+                    parent[max(a, b)] = min(a, b)
+                    break
+            else:
+                reps.append(k)
+    groups = {}
+    for k, key in enumerate(keys):
+        groups.setdefault(root(k), []).extend(exact[key])
+    found = [[passages[i] for i in sorted(members)] for members in groups.values() if len(members) > 1]
+    found.sort(key=lambda group: -len(group))
+    return found
+
+
+def avoid_path(gen_dir: str = GEN_DIR) -> str:
+    return os.path.join(gen_dir, AVOID_NAME)
+
+
+def load_avoid(gen_dir: str = GEN_DIR) -> dict:
+    """{cloud: [text to avoid]} from avoid.json, or {} if there is none."""
+    try:
+        with open(avoid_path(gen_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if data.get("version") != AVOID_VERSION:
+        return {}
+    return {int(cloud): texts for cloud, texts in data.get("clouds", {}).items()}
+
+
+def save_avoid(gen_dir: str, avoid: dict) -> None:
+    path = avoid_path(gen_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": AVOID_VERSION, "clouds": {str(c): avoid[c] for c in sorted(avoid)}},
+                  f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def update_avoid(gen_dir: str, groups: list) -> tuple:
+    """Add near-duplicate `groups` to avoid.json: every cloud in a group except the first
+    avoids the first cloud's text. Returns (all lists, number of texts added)."""
+    avoid = load_avoid(gen_dir)
+    added = 0
+    for group in groups:
+        first = min(group, key=lambda p: p.cloud)
+        text = first.key if len(first.key) <= AVOID_CHARS else first.key[:AVOID_CHARS - 1] + "…"
+        for cloud in sorted({p.cloud for p in group if p.cloud != first.cloud}):
+            texts = avoid.setdefault(cloud, [])
+            if len(texts) < MAX_AVOID and normalize(text) not in {normalize(t) for t in texts}:
+                texts.append(text)
+                added += 1
+    if added:
+        save_avoid(gen_dir, avoid)
+    return avoid, added
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gen-dir", default=GEN_DIR, help="Directory with cloud*.json (default: scripts/generated)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Jaccard similarity of {NGRAM}-grams that counts as a repeat (default: {THRESHOLD})")
+    parser.add_argument("--write", action="store_true",
+                        help="Add the repeats across clouds to avoid.json for the next generation")
+    args = parser.parse_args()
+
+    passages = course_passages(args.gen_dir)
+    groups = near_duplicates(passages, args.threshold)
+    clouds = len({p.cloud for p in passages})
+    print(f"{len(passages)} questions and slides in {clouds} clouds: {len(groups)} group(s) of near-duplicates")
+    for group in groups:
+        where = ", ".join(f"{p.cloud}:{p.index + 1}" for p in group[:12]) + (", ..." if len(group) > 12 else "")
+        print(f"  {len(group)}x {group[0].kind} (cloud:position {where}): {group[0].text[:70]!r}")
+    if args.write:
+        avoid, added = update_avoid(args.gen_dir, groups)
+        print(f"Added {added} text(s) to {avoid_path(args.gen_dir)} "
+              f"({sum(len(t) for t in avoid.values())} across {len(avoid)} clouds)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Opt-in stage timing for the content scripts (--profile / --trace FILE).
+
+Code marks a stage with
+
+    with span("repair", cloud=7) as counts:
+        ...
+        counts["fixes"] = 3
+
+Until start() is called, span() records nothing, so runs without the flags
+behave as before. Spans may be opened from any thread.
+
+Stages and what they count:
+  prompt    building one cloud's request body            tokens_in
+  call      one model request, retries included           tokens_in, tokens_out, retries
+  quota     waiting for the RPM / TPM token buckets       tokens
+  network   one HTTP request until its body is read       status, bytes_in
+  stream    reading a streamed response                   chunks, bytes_in
+  backoff   sleeping before a retry                       status
+  extract   parsing JSON out of a response                chars
+  repair    lesson_repair on one lesson                   items_in, items_out, fixes, errors
+  load      reading a generated lesson file               bytes
+  index     locating the cases in CourseStructure.swift   cases
+  render    one Swift case                                bytes
+  splice    replacing cases in CourseStructure.swift      cases
+  write     writing an output file                        bytes
+  cloud     one cloud from request to saved file          (contains the above)
+
+--profile prints per-stage totals and how the leaf-stage time splits between
+network, quota, cpu and io, which tells a network-, quota- or CPU-bound run
+apart. --trace FILE writes every span as one JSON object per line to FILE and
+the same spans as a Chrome trace to FILE's name with .trace.json (open it in
+chrome://tracing or https://ui.perfetto.dev).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Leaf stages by what they wait for; "call" and "cloud" contain other spans.
+STAGE_KINDS = {"quota": "quota", "backoff": "quota", "network": "network", "stream": "network",
+               "prompt": "cpu", "extract": "cpu", "repair": "cpu", "index": "cpu", "render": "cpu",
+               "splice": "cpu", "load": "io", "write": "io"}
+NOT_COUNTS = ("cloud", "status", "attempt", "error")
+
+_tracer = None
+
+
+class Tracer:
+    """Finished spans of one run, with times relative to start()."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def record(self, name: str, started: float, ended: float, fields: dict) -> None:
+        entry = {"name": name, "start": round(started - self.origin, 6), "dur": round(ended - started, 6),
+                 "thread": threading.current_thread().name, **fields}
+        with self.lock:
+            self.spans.append(entry)
+
+    def summary(self) -> dict:
+        """{stage: {"spans", "seconds", "max", "counts": {field: total}}} in first-seen order."""
+        stages = {}
+        with self.lock:
+            spans = list(self.spans)
+        for s in spans:
+            row = stages.setdefault(s["name"], {"spans": 0, "seconds": 0.0, "max": 0.0, "counts": {}})
+            row["spans"] += 1
+            row["seconds"] += s["dur"]
+            row["max"] = max(row["max"], s["dur"])
+            for key, value in s.items():
+                if key in NOT_COUNTS or key in ("name", "start", "dur", "thread"):
+                    continue
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    row["counts"][key] = row["counts"].get(key, 0) + value
+        return stages
+
+    def print_summary(self) -> None:
+        wall = time.perf_counter() - self.origin
+        stages = self.summary()
+        print(f"\nProfile ({wall:.2f}s wall; stage times are summed over threads):")
+        print(f"  {'stage':<9} {'spans':>6} {'total':>9} {'mean':>9} {'max':>9}  counts")
+        for name, row in stages.items():
+            counts = ", ".join(f"{k}={v:g}" for k, v in row["counts"].items())
+            print(f"  {name:<9} {row['spans']:>6} {row['seconds']:>8.3f}s {row['seconds'] / row['spans']:>8.4f}s "
+                  f"{row['max']:>8.3f}s  {counts}")
+        kinds = {}
+        for name, row in stages.items():
+            if name in STAGE_KINDS:
+                kinds[STAGE_KINDS[name]] = kinds.get(STAGE_KINDS[name], 0.0) + row["seconds"]
+        busy = sum(kinds.values())
+        if busy:
+            split = ", ".join(f"{k} {v / busy:.0%}" for k, v in sorted(kinds.items(), key=lambda kv: -kv[1]))
+            print(f"  time by kind: {split} -> mostly {max(kinds, key=kinds.get)}-bound")
+
+    def write(self, path: str) -> str:
+        """Write the spans to `path` (JSONL) and a Chrome trace beside it. Returns the trace's path."""
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        with open(path, "w", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s, ensure_ascii=False) + "\n")
+        pid = os.getpid()
+        tids = {}
+        events = []
+        for s in spans:
+            if s["thread"] not in tids:
+                tids[s["thread"]] = len(tids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tids[s["thread"]],
+                               "args": {"name": s["thread"]}})
+            args = {k: v for k, v in s.items() if k not in ("name", "start", "dur", "thread")}
+            events.append({"name": s["name"], "cat": STAGE_KINDS.get(s["name"], "pipeline"), "ph": "X",
+                           "ts": round(s["start"] * 1e6, 1), "dur": round(s["dur"] * 1e6, 1),
+                           "pid": pid, "tid": tids[s["thread"]], "args": args})
+        chrome = chrome_trace_path(path)
+        with open(chrome, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return chrome
+
+
+def chrome_trace_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".trace.json"
+
+
+def start() -> Tracer:
+    """Begin recording spans (from every thread) for the rest of the process."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **fields):
+    """Time the block as stage `name`. Yields a dict the block can add counts to;
+    an exception escaping the block is noted as "error" and re-raised."""
+    tracer = _tracer
+    if tracer is None:
+        yield fields
+        return
+    started = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        tracer.record(name, started, time.perf_counter(), fields)
+
+
+def finish(trace_path=None, profile: bool = False) -> None:
+    """End of a run: print the summary (--profile) and write the trace files (--trace)."""
+    if _tracer is None:
+        return
+    if profile or trace_path:
+        _tracer.print_summary()
+    if trace_path:
+        chrome = _tracer.write(trace_path)
+        print(f"Wrote {len(_tracer.spans)} spans to {trace_path} and {chrome}")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Pre-render Kazakh TTS for every listening question so the app does not call
+get-kazakh-audio at runtime.
+
+Collects the unique audio_text strings from scripts/generated/cloud*.json and
+the bundled lessons in CourseStructure.swift, synthesizes the missing ones
+concurrently and stores them content-addressed:
+
+  <store>/<sha256(voice|format|text)>.mp3
+  <store>/prerendered_audio.json   {"items": {text: {"file", "sha256", "bytes"}}, ...}
+
+A phrase whose file already exists is never synthesized again. The default store
+is inside the app target, so the files and manifest ship with the app
+(KazakhAudioButton plays them before falling back to the Edge Function).
+
+Run:
+  AZURE_REGION=eastus AZURE_SPEECH_KEY=yourkey python3 scripts/prerender_audio.py
+  python3 scripts/prerender_audio.py --backend stub --store /tmp/audio   # offline placeholders
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from xml.sax.saxutils import escape
+
+from swift_cases import parse_all_lessons
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GEN_DIR = os.path.join(SCRIPT_DIR, "generated")
+COURSE_FILE = os.path.join(SCRIPT_DIR, "..", "OYAN App", "OYAN App", "CourseStructure.swift")
+DEFAULT_STORE = os.path.join(SCRIPT_DIR, "..", "OYAN App", "OYAN App", "PrerenderedAudio")
+MANIFEST_NAME = "prerendered_audio.json"
+
+# Same voice and format as supabase/functions/get-kazakh-audio
+KAZAKH_VOICE = "kk-KZ-AigulNeural"
+OUTPUT_FORMAT = "audio-16khz-128kbitrate-mono-mp3"
+SSML_ENTITIES = {'"': "&quot;", "'": "&apos;"}  # escape() already handles & < >
+STUB_MAGIC = b"STUBAUDIO\n"
+
+
+class AzureBackend:
+    """Azure Speech REST API, as called by the get-kazakh-audio Edge Function."""
+
+    name = "azure"
+
+    def __init__(self, region: str, key: str, voice: str = KAZAKH_VOICE, output_format: str = OUTPUT_FORMAT):
+        self.url = f"https://{region}.tts.speech.microsoft.com/cognitiveservices/v1"
+        self.key = key
+        self.voice = voice
+        self.output_format = output_format
+
+    def synthesize(self, text: str) -> bytes:
+        body = escape(text, SSML_ENTITIES)
+        ssml = (f"<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='kk-KZ'>"
+                f"<voice name='{self.voice}'>{body}</voice></speak>")
+        req = urllib.request.Request(
+            self.url,
+            data=ssml.encode("utf-8"),
+            headers={
+                "Ocp-Apim-Subscription-Key": self.key,
+                "Content-Type": "application/ssml+xml",
+                "X-Microsoft-OutputFormat": self.output_format,
+                "User-Agent": "OYAN-App/1.0",
+            },
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=30) as r:
+            data = r.read()
+        if not data:
+            raise ValueError("Empty audio from Azure")
+        return data
+
+
+class StubBackend:
+    """Offline stand-in for Azure: deterministic placeholder bytes, no network.
+
+    Its files get their own keys (see audio_key) and main() keeps them out of the app."""
+
+    name = "stub"
+
+    def __init__(self, voice: str = KAZAKH_VOICE, output_format: str = OUTPUT_FORMAT, delay: float = 0.0):
+        self.voice = voice
+        self.output_format = output_format
+        self.delay = delay
+        self.calls = 0
+
+    def synthesize(self, text: str) -> bytes:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return STUB_MAGIC + f"{self.voice}\n{self.output_format}\n{text}".encode("utf-8")
+
+
+def audio_key(text: str, voice: str, output_format: str, backend: str = "azure") -> str:
+    """Content address of one phrase; backends other than Azure get their own keys."""
+    source = "" if backend == "azure" else f"{backend}|"
+    return hashlib.sha256(f"{source}{voice}|{output_format}|{text}".encode("utf-8")).hexdigest()
+
+
+def is_placeholder(path: str) -> bool:
+    """True for a file written by StubBackend."""
+    with open(path, "rb") as f:
+        return f.read(len(STUB_MAGIC)) == STUB_MAGIC
+
+
+def in_app_target(store: str) -> bool:
+    app = os.path.realpath(os.path.dirname(DEFAULT_STORE))
+    return os.path.commonpath([app, os.path.realpath(store)]) == app
+
+
+def collect_audio_texts(gen_dir: str = GEN_DIR, course_file: str = COURSE_FILE) -> list:
+    """Unique, trimmed audio texts from generated JSON and bundled Swift lessons, in first-seen order."""
+    seen = {}
+    for path in sorted(glob.glob(os.path.join(gen_dir, "cloud*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for q in data.get("quiz", []):
+            text = (q.get("audio_text") or q.get("audioText") or "").strip()
+            if text:
+                seen.setdefault(text, None)
+    if os.path.exists(course_file):
+        with open(course_file, "r", encoding="utf-8") as f:
+            lessons = parse_all_lessons(f.read())
+        for by_cloud in lessons.values():
+            for cloud in sorted(by_cloud):
+                for q in by_cloud[cloud].get("quiz", []):
+                    text = (q.get("audioText") or "").strip()
+                    if text:
+                        seen.setdefault(text, None)
+    return list(seen)
+
+
+def load_store_manifest(store: str) -> dict:
+    try:
+        with open(os.path.join(store, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": 1, "items": {}}
+
+
+def prerender(texts, backend, store: str, concurrency: int = 4) -> dict:
+    """Synthesize texts missing from the store. Returns stats; updates the store manifest."""
+    os.makedirs(store, exist_ok=True)
+    manifest = load_store_manifest(store)
+    manifest.update({"version": 1, "voice": backend.voice, "format": backend.output_format})
+    items = manifest.setdefault("items", {})
+    ext = "mp3" if "mp3" in backend.output_format else "bin"
+
+    todo = []
+    for text in texts:
+        key = audio_key(text, backend.voice, backend.output_format, backend.name)
+        filename = f"{key}.{ext}"
+        path = os.path.join(store, filename)
+        # Placeholders from older stub runs shared Azure's keys; real backends replace them.
+        if os.path.exists(path) and (backend.name == "stub" or not is_placeholder(path)):
+            items[text] = {"file": filename, "sha256": key, "bytes": os.path.getsize(path)}
+        else:
+            todo.append((text, key, filename, path))
+
+    def render(job):
+        text, key, filename, path = job
+        data = backend.synthesize(text)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return text, {"file": filename, "sha256": key, "bytes": len(data)}
+
+    failed = {}
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(render, job): job[0] for job in todo}
+        for fut in as_completed(futures):
+            text = futures[fut]
+            try:
+                text, item = fut.result()
+                items[text] = item
+                print(f"  rendered {text!r} ({item['bytes']:,} bytes)")
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                failed[text] = str(e)
+                print(f"  ERROR {text!r}: {e}")
+
+    # Only phrases still in the course stay in the manifest; their files are kept either way.
+    wanted = set(texts)
+    manifest["items"] = {t: items[t] for t in sorted(items) if t in wanted}
+    with open(os.path.join(store, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return {
+        "texts": len(texts),
+        "cached": len(texts) - len(todo),
+        "rendered": len(todo) - len(failed),
+        "failed": failed,
+        "seconds": time.monotonic() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["azure", "stub"], default="azure")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="Content-addressed audio directory")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel synthesis requests (default: 4)")
+    parser.add_argument("--voice", default=KAZAKH_VOICE)
+    args = parser.parse_args()
+
+    if args.backend == "azure":
+        region, key = os.environ.get("AZURE_REGION"), os.environ.get("AZURE_SPEECH_KEY")
+        if not region or not key:
+            print("ERROR: Set AZURE_REGION and AZURE_SPEECH_KEY (or use --backend stub).")
+            return 1
+        backend = AzureBackend(region, key, voice=args.voice)
+    else:
+        if in_app_target(args.store):
+            print("ERROR: --backend stub writes placeholder audio; pass a --store outside OYAN App/.")
+            return 1
+        backend = StubBackend(voice=args.voice)
+
+    texts = collect_audio_texts()
+    print(f"{len(texts)} unique audio texts")
+    stats = prerender(texts, backend, args.store, args.concurrency)
+    print(f"Done. {stats['cached']} already in store, {stats['rendered']} rendered, "
+          f"{len(stats['failed'])} failed in {stats['seconds']:.1f}s. Store: {args.store}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
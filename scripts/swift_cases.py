@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Index and splice the `switch cloudIndex` cases in CourseStructure.swift.
+
+index_cases() scans the file once and maps every (function, case number) in
+GeneratedLessonContent's bundled* functions to its character span.
+splice_cases() then emits the patched file in one pass, so updating N cases
+costs one read and one join instead of N whole-file rebuilds.
+
+Spans run from the newline before `case N:` up to (not including) the newline
+before the next `case`/`default`, matching what render_swift_case() renders.
+
+parse_lesson_literal() reads a case's `GeneratedLessonContent(...)` literal back
+into the dict its Codable implementation expects.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+FUNC_RE = re.compile(r"static func (bundled\w+)\s*\(")
+CASE_RE = re.compile(r"case\s+(\d+)\s*:|default\s*:")
+
+# Language code -> bundled function in GeneratedLessonContent
+LANG_FUNCS = {"en": "bundledEnglish", "ru": "bundledRussian"}
+
+
+class SwitchIndex:
+    """Case spans of one function's switch."""
+
+    def __init__(self, func: str):
+        self.func = func
+        self.cases: Dict[int, Tuple[int, int]] = {}
+        self.insert_at = -1  # where new cases go: before `default:` or the closing brace
+        self.duplicates: List[int] = []  # case numbers that appear more than once (the last span wins)
+
+    def __repr__(self):
+        return f"SwitchIndex({self.func!r}, cases={sorted(self.cases)})"
+
+
+def _skip_string(text: str, i: int) -> int:
+    """i points at an opening quote; return the index just past the literal."""
+    if text.startswith('"""', i):
+        end = text.find('"""', i + 3)
+        while end != -1 and text[end - 1] == "\\":
+            end = text.find('"""', end + 1)
+        return len(text) if end == -1 else end + 3
+    i += 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"' or c == "\n":
+            return i + 1
+        i += 1
+    return n
+
+
+def _scan(text: str, start: int):
+    """Yield (index, char, depth) for structural characters outside strings/comments."""
+    depth = 0
+    i = start
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '"':
+            i = _skip_string(text, i)
+            continue
+        if c == "/" and text.startswith("//", i):
+            nl = text.find("\n", i)
+            i = n if nl == -1 else nl
+            continue
+        if c == "/" and text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if c == "{":
+            depth += 1
+            yield i, c, depth
+        elif c == "}":
+            yield i, c, depth
+            depth -= 1
+            if depth == 0:
+                return
+        elif c in "cd":
+            yield i, c, depth
+        i += 1
+
+
+def _line_start(text: str, i: int) -> int:
+    """Index of the newline that begins the line containing i."""
+    return text.rfind("\n", 0, i)
+
+
+def _close_case(idx: SwitchIndex, case: Tuple[int, int], end: int) -> None:
+    if case[0] in idx.cases:
+        idx.duplicates.append(case[0])
+    idx.cases[case[0]] = (case[1], end)
+
+
+def index_cases(text: str) -> Dict[str, SwitchIndex]:
+    """Single scan over every bundled* function; returns {func name: SwitchIndex}."""
+    out: Dict[str, SwitchIndex] = {}
+    for m in FUNC_RE.finditer(text):
+        func = m.group(1)
+        body = text.find("{", m.end())
+        if body == -1:
+            continue
+        idx = SwitchIndex(func)
+        switch_depth = None
+        open_case = None  # (number, span start)
+        for i, c, depth in _scan(text, body):
+            if c == "{" and switch_depth is None and text[_line_start(text, i):i].strip().startswith("switch"):
+                switch_depth = depth
+            elif c in "cd" and switch_depth is not None and depth == switch_depth:
+                if i > 0 and (text[i - 1].isalnum() or text[i - 1] == "_"):
+                    continue
+                cm = CASE_RE.match(text, i)
+                if not cm:
+                    continue
+                line = _line_start(text, i)
+                if open_case is not None:
+                    _close_case(idx, open_case, line)
+                    open_case = None
+                if cm.group(1) is not None:
+                    open_case = (int(cm.group(1)), line)
+                else:
+                    idx.insert_at = line
+            elif c == "}" and switch_depth is not None and depth == switch_depth:
+                line = _line_start(text, i)
+                if open_case is not None:
+                    _close_case(idx, open_case, line)
+                    open_case = None
+                if idx.insert_at == -1:
+                    idx.insert_at = line
+                break
+        out[func] = idx
+    return out
+
+
+def splice_cases(text: str, index: Dict[str, SwitchIndex], replacements: Dict[Tuple[str, int], str]) -> Tuple[str, List[Tuple[str, int]]]:
+    """Replace (func, case) blocks in one pass. Cases missing from a switch are inserted before `default:`.
+
+    Returns (new_text, [(func, case) that were not found and had no switch to go into]).
+    """
+    edits = []  # (start, end, case number, block)
+    missing = []
+    for (func, cloud), block in replacements.items():
+        sw = index.get(func)
+        if sw is None:
+            missing.append((func, cloud))
+            continue
+        if cloud in sw.cases:
+            start, end = sw.cases[cloud]
+            edits.append((start, end, cloud, block))
+        elif sw.insert_at != -1:
+            edits.append((sw.insert_at, sw.insert_at, cloud, block))
+        else:
+            missing.append((func, cloud))
+    # Stable order: by position, then by case number for inserts at the same spot.
+    edits.sort(key=lambda e: e[:3])
+    parts = []
+    pos = 0
+    for start, end, _, block in edits:
+        parts.append(text[pos:start])
+        parts.append(block)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts), missing
+
+
+# -- Literal parsing -----------------------------------------------------------
+#
+# Turns the `GeneratedLessonContent(...)` literal of a case back into the dict
+# JSONDecoder expects for GeneratedLessonContent / GeneratedQuizItem (same keys
+# as their CodingKeys).
+
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<str>")
+  | (?P<num>-?\d+)
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<punct>[()\[\]:,])
+''', re.S | re.X)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", '"': '"', "'": "'", "\\": "\\"}
+
+# Swift argument label -> Codable JSON key
+LESSON_KEYS = {"title": "title", "explanationSlides": "explanation_slides", "examples": "examples", "quiz": "quiz"}
+QUIZ_KEYS = {"question": "question", "options": "options", "correctIndex": "correct_index",
+             "points": "points", "type": "question_type", "audioText": "audioText"}
+
+
+class SwiftLiteralError(ValueError):
+    pass
+
+
+def _read_string(text: str, i: int):
+    """i points past the opening quote. Returns (value, index past closing quote)."""
+    out = []
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '"':
+            return "".join(out), i + 1
+        if c == "\n":
+            break
+        if c == "\\":
+            nxt = text[i + 1] if i + 1 < n else ""
+            if nxt == "u" and text.startswith("{", i + 2):
+                end = text.index("}", i + 3)
+                out.append(chr(int(text[i + 3:end], 16)))
+                i = end + 1
+                continue
+            if nxt not in _ESCAPES:
+                raise SwiftLiteralError(f"Unsupported escape \\{nxt} at {i}")
+            out.append(_ESCAPES[nxt])
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    raise SwiftLiteralError(f"Unterminated string at {i}")
+
+
+def _tokens(text: str, start: int, end: int):
+    i = start
+    while i < end:
+        m = TOKEN_RE.match(text, i)
+        if not m:
+            raise SwiftLiteralError(f"Unexpected character {text[i]!r} at {i}")
+        kind = m.lastgroup
+        if kind == "ws":
+            i = m.end()
+            continue
+        if kind == "str":
+            value, i = _read_string(text, m.end())
+            yield "str", value, m.start()
+            continue
+        yield kind, m.group(kind), m.start()
+        i = m.end()
+    yield "eof", None, end
+
+
+class _Parser:
+    def __init__(self, text: str, start: int, end: int):
+        self.toks = _tokens(text, start, end)
+        self.advance()
+
+    def advance(self):
+        self.kind, self.value, self.pos = next(self.toks)
+
+    def expect(self, kind, value=None):
+        if self.kind != kind or (value is not None and self.value != value):
+            raise SwiftLiteralError(f"Expected {value or kind} at {self.pos}, got {self.value!r}")
+        v = self.value
+        self.advance()
+        return v
+
+    def value_(self):
+        if self.kind == "str":
+            return self.expect("str")
+        if self.kind == "num":
+            return int(self.expect("num"))
+        if self.kind == "punct" and self.value == "[":
+            self.advance()
+            items = []
+            while not (self.kind == "punct" and self.value == "]"):
+                items.append(self.value_())
+                if self.kind == "punct" and self.value == ",":
+                    self.advance()
+            self.advance()
+            return items
+        if self.kind == "ident":
+            name = self.expect("ident")
+            if name == "nil":
+                return None
+            if name in ("true", "false"):
+                return name == "true"
+            self.expect("punct", "(")
+            args = {}
+            while not (self.kind == "punct" and self.value == ")"):
+                label = self.expect("ident")
+                self.expect("punct", ":")
+                args[label] = self.value_()
+                if self.kind == "punct" and self.value == ",":
+                    self.advance()
+            self.advance()
+            return name, args
+        raise SwiftLiteralError(f"Unexpected {self.value!r} at {self.pos}")
+
+
+def _to_codable(node):
+    if isinstance(node, tuple):
+        name, args = node
+        keys = LESSON_KEYS if name == "GeneratedLessonContent" else QUIZ_KEYS if name == "GeneratedQuizItem" else None
+        if keys is None:
+            raise SwiftLiteralError(f"Unknown initializer {name}")
+        out = {}
+        for label, value in args.items():
+            if label not in keys:
+                raise SwiftLiteralError(f"Unknown argument {label}: in {name}")
+            if value is not None:
+                out[keys[label]] = _to_codable(value)
+        return out
+    if isinstance(node, list):
+        return [_to_codable(v) for v in node]
+    return node
+
+
+def parse_lesson_literal(text: str, start: int = 0, end: int = None):
+    """Parse the first `GeneratedLessonContent(...)` in text[start:end].
+
+    Returns the Codable dict, or None if the span has no literal (e.g. `default:`
+    falling back to another function).
+    """
+    end = len(text) if end is None else end
+    at = text.find("GeneratedLessonContent(", start, end)
+    if at == -1:
+        return None
+    parser = _Parser(text, at, end)
+    return _to_codable(parser.value_())
+
+
+def parse_all_lessons(text: str, index: Dict[str, SwitchIndex] = None) -> Dict[str, Dict[int, dict]]:
+    """{func: {case number: lesson dict}} for every literal case in the file."""
+    index = index_cases(text) if index is None else index
+    out: Dict[str, Dict[int, dict]] = {}
+    for func, sw in index.items():
+        lessons = out.setdefault(func, {})
+        for cloud, (start, end) in sorted(sw.cases.items()):
+            lesson = parse_lesson_literal(text, start, end)
+            if lesson is not None:
+                lessons[cloud] = lesson
+    return out
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Translate the generated English lessons into Russian (or another language) in batches.
+
+Every translatable string across scripts/generated/cloud*.json is collected
+first: title, slides, the English half of "Kazakh — English" examples, question
+stems, English-side options and answers, and pair meanings. Kazakh-only text and
+"X - [X]" transcriptions are left alone. Strings already in the translation
+memory (scripts/generated/translation_memory.<lang>.json) are reused; only the
+unseen ones are sent, many to a request, as a numbered JSON object. Results are
+added to the memory as each batch returns, and every lesson is then reassembled
+as cloudN.<lang>.json, which apply_generated_to_swift.py renders into the
+matching bundled switch (bundledRussian for ru).
+
+Lessons are repaired by lesson_repair.py before their strings are collected, so
+the stems and options it writes are translated too. A lesson with any string
+still missing after MAX_ROUNDS is not written.
+
+Run:
+  GEMINI_API_KEY=yourkey python3 scripts/translate_lessons.py
+  python3 scripts/translate_lessons.py --clouds 8 9 --dry-run   # counts only, no requests
+  python3 scripts/translate_lessons.py --concurrency 4 --batch-chars 6000
+  GEMINI_API_KEY=mock python3 scripts/translate_lessons.py --base-url=http://127.0.0.1:8765/v1beta
+Then run: python3 scripts/apply_generated_to_swift.py --lang ru
+"""
+
+import argparse
+import copy
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from apply_generated_to_swift import GEN_DIR, generated_clouds, generated_path, load_generated
+from gemini_client import DEFAULT_BASE_URL, GeminiError
+from generate_units_gemini import extract_json, get_api_key, log_retry, make_client
+from lesson_repair import repair_lesson
+from vocabulary import split_example, updated_vocabulary
+
+LANGUAGES = {"ru": "Russian"}
+TRANSLATION_CONFIG = {"maxOutputTokens": 8192, "temperature": 0.1, "responseMimeType": "application/json"}
+MEMORY_VERSION = 1
+MAX_ROUNDS = 2  # strings missing or rejected in a batch are sent once more
+QUIZ_KEYS = ("question", "correct_answer", "text")
+LATIN_RE = re.compile(r"[A-Za-z]")
+TRANSCRIPTION_RE = re.compile(r"^(?:.*\s-\s+)?\[[^\]]*\]$")
+
+TRANSLATION_PROMPT = """Translate the English strings below into {language} for a Kazakh course app whose learners speak {language}.
+Rules:
+- Keep every Kazakh word and phrase exactly as written (Cyrillic Kazakh is NOT to be translated).
+- Keep **double asterisks**, "____" blanks, line breaks and transcriptions in [brackets] unchanged.
+- Keep explanations in parentheses, e.g. "(formal)", translated but in parentheses.
+- Translate each string on its own; do not merge or split them.
+Output ONLY a JSON object mapping every id below to its translation (no markdown).
+
+Strings:
+{strings}"""
+
+
+def translatable(text) -> bool:
+    return isinstance(text, str) and bool(LATIN_RE.search(text)) and not TRANSCRIPTION_RE.match(text.strip())
+
+
+def map_lesson(data: dict, fn) -> dict:
+    """Copy of a lesson with `fn` applied to every translatable string."""
+    def tr(s):
+        return fn(s) if translatable(s) else s
+
+    out = copy.deepcopy(data)
+    if "title" in out:
+        out["title"] = tr(out["title"])
+    out["explanation_slides"] = [tr(s) for s in out.get("explanation_slides", [])]
+    examples = []
+    for example in out.get("examples", []):
+        pair = split_example(example)
+        if pair and translatable(pair[1]) and not translatable(pair[0]):
+            examples.append(f"{pair[0]} — {fn(pair[1])}")
+        else:
+            examples.append(tr(example))
+    out["examples"] = examples
+    for q in out.get("quiz", []):
+        if not isinstance(q, dict):
+            continue
+        for key in QUIZ_KEYS:
+            if key in q:
+                q[key] = tr(q[key])
+        if isinstance(q.get("options"), list):
+            q["options"] = [tr(o) for o in q["options"]]
+        for p in q.get("pairs") or []:
+            if isinstance(p, dict) and "english" in p:
+                p["english"] = tr(p["english"])
+    return out
+
+
+def lesson_strings(data: dict) -> list:
+    """Translatable strings of a lesson, in order, with repeats."""
+    found = []
+    map_lesson(data, lambda s: found.append(s) or s)
+    return found
+
+
+def translation_problem(source: str, translated) -> str:
+    """Why a returned translation is unusable, or "" if it is fine."""
+    if not isinstance(translated, str) or not translated.strip():
+        return "empty"
+    if source.count("**") != translated.count("**"):
+        return "highlight markers changed"
+    if ("____" in source) != ("____" in translated):
+        return "blank changed"
+    return ""
+
+
+def pack_batches(texts: list, max_chars: int, max_items: int) -> list:
+    """Consecutive groups of strings, each under `max_chars` in total and `max_items` long."""
+    batches, current, size = [], [], 0
+    for text in texts:
+        if current and (size + len(text) > max_chars or len(current) >= max_items):
+            batches.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_translation_prompt(language: str, texts: list) -> str:
+    strings = json.dumps({str(i): t for i, t in enumerate(texts)}, ensure_ascii=False, indent=1)
+    return TRANSLATION_PROMPT.format(language=language, strings=strings)
+
+
+def translate_batch(client, language: str, texts: list):
+    """One request for a batch. Returns ({source: translation}, {source: problem}, retries, tokens)."""
+    result = client.generate(build_translation_prompt(language, texts), TRANSLATION_CONFIG, on_retry=log_retry)
+    data = extract_json(result.text)
+    done, rejected = {}, {}
+    for i, source in enumerate(texts):
+        translated = data.get(str(i))
+        problem = translation_problem(source, translated)
+        if problem:
+            rejected[source] = problem
+        else:
+            done[source] = translated
+    return done, rejected, result.retries, (result.usage or {}).get("totalTokenCount", 0)
+
+
+def memory_path(lang: str) -> str:
+    return os.path.join(GEN_DIR, f"translation_memory.{lang}.json")
+
+
+def load_memory(lang: str) -> dict:
+    try:
+        with open(memory_path(lang), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if data.get("version") != MEMORY_VERSION or data.get("lang") != lang:
+        return {}
+    return data["entries"]
+
+
+def save_memory(lang: str, entries: dict) -> None:
+    path = memory_path(lang)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MEMORY_VERSION, "lang": lang, "entries": dict(sorted(entries.items()))},
+                  f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--key", help="Gemini API key")
+    parser.add_argument("--lang", choices=sorted(LANGUAGES), default="ru", help="Target language (default: ru)")
+    parser.add_argument("--clouds", type=int, nargs="+", help="Only translate these clouds")
+    parser.add_argument("--batch-chars", type=int, default=4000,
+                        help="Source characters per request (default: 4000)")
+    parser.add_argument("--batch-size", type=int, default=60, help="Strings per request at most (default: 60)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Batch requests in flight (default: 1)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Translate every string again instead of reusing the translation memory")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be sent without calling the model")
+    parser.add_argument("--rpm", type=float, default=15,
+                        help="Requests per minute allowed by the quota (default: 15, 0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=1_000_000,
+                        help="Tokens per minute allowed by the quota (default: 1000000, 0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Retries per call on 429/5xx with exponential backoff (default: 5)")
+    parser.add_argument("--base-url", default=os.environ.get("GEMINI_BASE_URL", DEFAULT_BASE_URL),
+                        help="Gemini API base URL (default: $GEMINI_BASE_URL or Google's v1beta endpoint)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    language = LANGUAGES[args.lang]
+    if not os.path.isdir(GEN_DIR):
+        print(f"ERROR: {GEN_DIR} not found. Run generate_units_gemini.py first.")
+        return 1
+    clouds = [c for c in generated_clouds() if not args.clouds or c in args.clouds]
+
+    vocab = updated_vocabulary(GEN_DIR)
+    lessons = {}
+    strings = {}
+    per_lesson = 0
+    occurrences = 0
+    for cloud in clouds:
+        lessons[cloud] = repair_lesson(load_generated(generated_path(cloud, "en")), vocab, cloud)[0]
+        found = lesson_strings(lessons[cloud])
+        occurrences += len(found)
+        per_lesson += len(set(found))
+        for text in found:
+            strings.setdefault(text, None)
+    memory = {} if args.refresh else load_memory(args.lang)
+    stored = load_memory(args.lang) if args.refresh else memory
+    pending = [t for t in strings if t not in memory]
+    print(f"Collected {occurrences} strings ({len(strings)} unique) from {len(clouds)} clouds")
+    print(f"  memory: {len(strings) - len(pending)} hit(s); {len(pending)} to translate "
+          f"in {len(pack_batches(pending, args.batch_chars, args.batch_size))} request(s)")
+
+    requests = retries = tokens = 0
+    sent = 0
+    started = time.monotonic()
+    if pending and not args.dry_run:
+        api_key = get_api_key(args)
+        if not api_key:
+            print("ERROR: Set GEMINI_API_KEY or pass --key=YOUR_KEY.")
+            return 1
+        client = make_client(args, api_key)
+        rejected = {}
+        for round_no in range(MAX_ROUNDS):
+            if not pending:
+                break
+            batches = pack_batches(pending, args.batch_chars, args.batch_size)
+            with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+                futures = {pool.submit(translate_batch, client, language, batch): batch for batch in batches}
+                for fut in as_completed(futures):
+                    batch = futures[fut]
+                    requests += 1
+                    sent += len(batch)
+                    try:
+                        done, bad, batch_retries, batch_tokens = fut.result()
+                    except (GeminiError, ValueError) as e:
+                        retries += getattr(e, "retries", 0)
+                        print(f"  ERROR batch of {len(batch)}: {e}")
+                        continue
+                    retries += batch_retries
+                    tokens += batch_tokens
+                    rejected.update(bad)
+                    memory.update(done)
+                    stored.update(done)
+                    save_memory(args.lang, stored)
+                    print(f"  batch of {len(batch)}: {len(done)} translated, {len(bad)} rejected")
+            pending = [t for t in pending if t not in memory]
+        for text in pending:
+            print(f"  WARN untranslated ({rejected.get(text, 'no response')}): {text[:60]!r}")
+        client.close()
+
+    print(f"Sent {sent} strings in {requests} request(s), {tokens} tokens, {retries} retries, "
+          f"{time.monotonic() - started:.1f}s (one request per lesson would send {per_lesson} strings "
+          f"in {len(clouds)} requests)")
+    if args.dry_run:
+        return 0
+
+    written = 0
+    for cloud, lesson in lessons.items():
+        missing = [t for t in lesson_strings(lesson) if t not in memory]
+        if missing:
+            print(f"  cloud {cloud}: {len(missing)} string(s) untranslated, cloud{cloud}.{args.lang}.json not written")
+            continue
+        with open(generated_path(cloud, args.lang), "w", encoding="utf-8") as f:
+            json.dump(map_lesson(lesson, memory.__getitem__), f, ensure_ascii=False, indent=2)
+        written += 1
+    print(f"Done. Wrote {written} of {len(lessons)} cloud*.{args.lang}.json to {GEN_DIR}/")
+    return 0 if written == len(lessons) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Check CourseStructure.swift after apply_generated_to_swift.py without building it.
+
+Structural checks on the whole file:
+  - (), [] and {} balance outside strings and comments, and no unterminated string
+  - every bundled* function has a switch, with no case number twice
+Per case of bundledEnglish / bundledRussian (see swift_cases.py):
+  - the span's brackets balance and its GeneratedLessonContent(...) literal parses
+  - every quiz item has options and a correctIndex inside them
+  - the lesson equals its cloudN.json (cloudN.ru.json for Russian) after
+    lesson_repair, as apply_generated_to_swift.py would render it; a generated
+    cloud with no case in the switch is reported too
+
+With many cases the per-case checks run in worker processes (--jobs). Exits 1
+if anything is wrong, so it can follow apply_generated_to_swift.py in a build
+script:
+  python3 scripts/apply_generated_to_swift.py && python3 scripts/verify_swift_output.py
+  python3 scripts/verify_swift_output.py --structure-only   # skip the JSON comparison
+"""
+
+import argparse
+import bisect
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from apply_generated_to_swift import COURSE_FILE, GEN_DIR, generated_clouds, generated_path, load_generated
+from lesson_repair import repair_lesson
+from swift_cases import LANG_FUNCS, SwiftLiteralError, _skip_string, index_cases, parse_lesson_literal
+from vocabulary import course_units, load_vocabulary
+
+PARALLEL_MIN = 32  # fewer cases than this are checked in-process
+PAIRS = {")": "(", "]": "[", "}": "{"}
+STRUCTURE_RE = re.compile(r'["()\[\]{}]|//|/\*')
+
+_vocabs = {}  # lang -> Vocabulary, set in each worker by _init
+
+
+class Lines:
+    """Line numbers of character offsets in `text`."""
+
+    def __init__(self, text: str):
+        self.starts = [m.end() for m in re.finditer("\n", text)]
+
+    def of(self, i: int) -> int:
+        return bisect.bisect_right(self.starts, i) + 1
+
+
+def balance_errors(text: str) -> list:
+    """Unmatched brackets and unterminated strings in `text`, outside comments."""
+    errors = []
+    stack = []
+    i, n = 0, len(text)
+    while True:
+        m = STRUCTURE_RE.search(text, i)
+        if not m:
+            break
+        i, c = m.start(), m.group()
+        if c == '"':
+            end = _skip_string(text, i)
+            if text[end - 1] == "\n" or (end == n and not text.endswith('"')):
+                errors.append(("unterminated string", i))
+            i = end
+        elif c == "//":
+            nl = text.find("\n", i)
+            i = n if nl == -1 else nl
+        elif c == "/*":
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        else:
+            if c in "([{":
+                stack.append((c, i))
+            else:
+                # Close the nearest matching bracket; anything opened after it was never closed.
+                k = next((k for k in range(len(stack) - 1, -1, -1) if stack[k][0] == PAIRS[c]), None)
+                if k is None:
+                    errors.append((f"unmatched {c!r}", i))
+                else:
+                    errors += [(f"{o!r} never closed", at) for o, at in stack[k + 1:]]
+                    del stack[k:]
+            i += 1
+    errors += [(f"{c!r} never closed", at) for c, at in stack]
+    lines = Lines(text) if errors else None
+    return [f"line {lines.of(at)}: {what}" for what, at in sorted(errors, key=lambda e: e[1])]
+
+
+def first_difference(swift, expected, path: str = "lesson"):
+    """Where the parsed Swift value first differs from the expected one, or None."""
+    if isinstance(swift, dict) and isinstance(expected, dict):
+        for key in list(expected) + [k for k in swift if k not in expected]:
+            if key not in swift:
+                return f"{path}.{key}: missing in Swift"
+            if key not in expected:
+                return f"{path}.{key}: in Swift but not in the JSON"
+            diff = first_difference(swift[key], expected[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(swift, list) and isinstance(expected, list):
+        for i, (a, b) in enumerate(zip(swift, expected)):
+            diff = first_difference(a, b, f"{path}[{i}]")
+            if diff:
+                return diff
+        if len(swift) != len(expected):
+            return f"{path}: {len(swift)} items in Swift, {len(expected)} in the JSON"
+        return None
+    if swift != expected:
+        return f"{path}: Swift {swift!r:.60} != JSON {expected!r:.60}"
+    return None
+
+
+def expected_lesson(repaired: dict) -> dict:
+    """The Codable dict of a repaired lesson, as render_swift_case() writes it."""
+    quiz = []
+    for q in repaired.get("quiz", []):
+        item = {"question": q.get("question", ""), "options": list(q.get("options", [])),
+                "correct_index": q.get("correct_index", 0)}
+        if q.get("points") is not None:
+            item["points"] = q["points"]
+        if q.get("question_type"):
+            item["question_type"] = q["question_type"]
+        if q.get("audio_text"):
+            item["audioText"] = q["audio_text"]
+        quiz.append(item)
+    return {"title": repaired.get("title", "Lesson"), "explanation_slides": list(repaired.get("explanation_slides", [])),
+            "examples": list(repaired.get("examples", [])), "quiz": quiz}
+
+
+def _init(vocabs: dict) -> None:
+    _vocabs.update(vocabs)
+
+
+def check_case(job: tuple) -> list:
+    """Problems with one case. job = (lang, cloud, first line, case text, JSON path or None)."""
+    lang, cloud, first_line, case_text, path = job
+    where = f"case {cloud} ({lang})"
+    if balance_errors(case_text):
+        return [f"{where} (line {first_line + 1}): brackets or strings do not balance, not parsed"]
+    problems = []
+    try:
+        lesson = parse_lesson_literal(case_text)
+    except (SwiftLiteralError, ValueError) as e:
+        return [f"{where} (line {first_line + 1}): {e}"]
+    if lesson is None:
+        return [f"{where}: no GeneratedLessonContent literal"] if path else []
+    quiz = lesson.get("quiz", [])
+    for i, q in enumerate(quiz):
+        options = q.get("options", [])
+        correct = q.get("correct_index")
+        if not options:
+            problems.append(f"{where} quiz item {i + 1}: no options")
+        elif not isinstance(correct, int) or not 0 <= correct < len(options):
+            problems.append(f"{where} quiz item {i + 1}: correctIndex {correct} out of range ({len(options)} options)")
+    if path:
+        repaired, _ = repair_lesson(load_generated(path), _vocabs.get(lang), cloud)
+        diff = first_difference(lesson, expected_lesson(repaired))
+        if diff:
+            problems.append(f"{where} differs from {os.path.basename(path)}: {diff}")
+    return problems
+
+
+def run_checks(jobs: list, workers: int, vocabs: dict) -> list:
+    if workers <= 1 or len(jobs) < PARALLEL_MIN:
+        _init(vocabs)
+        return [p for job in jobs for p in check_case(job)]
+    chunk = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(vocabs,)) as pool:
+        return [p for found in pool.map(check_case, jobs, chunksize=chunk) for p in found]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--swift", default=COURSE_FILE, help="Swift file to check (default: CourseStructure.swift)")
+    parser.add_argument("--lang", choices=["en", "ru", "all"], default="all",
+                        help="Which bundled switch to compare with the generated JSON (default: all)")
+    parser.add_argument("--structure-only", action="store_true",
+                        help="Only check brackets, cases and correctIndex, not the generated JSON")
+    parser.add_argument("--no-vocabulary", action="store_true",
+                        help="Repair without the course vocabulary (match apply_generated_to_swift.py --no-vocabulary)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help=f"Worker processes when there are at least {PARALLEL_MIN} cases (default: CPU count)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with open(args.swift, "r", encoding="utf-8") as f:
+        text = f.read()
+    problems = balance_errors(text)
+    lines = Lines(text)
+    index = index_cases(text)
+    langs = list(LANG_FUNCS) if args.lang == "all" else [args.lang]
+    compare = not args.structure_only and os.path.isdir(GEN_DIR)
+    clouds = generated_clouds() if compare else []
+    vocabs = {}
+    if compare and not args.no_vocabulary:
+        units = course_units()
+        for lang in langs:
+            vocabs[lang] = load_vocabulary(GEN_DIR, lang)
+            vocabs[lang].refresh(GEN_DIR, units)  # in memory only; apply saves it
+
+    jobs = []
+    for lang, func in LANG_FUNCS.items():
+        sw = index.get(func)
+        if sw is None:
+            problems.append(f"{func}: not found")
+            continue
+        if not sw.cases and sw.insert_at == -1:
+            problems.append(f"{func}: no switch")
+        for cloud in sorted(set(sw.duplicates)):
+            problems.append(f"{func}: case {cloud} appears more than once")
+        for cloud, (start, end) in sorted(sw.cases.items()):
+            path = generated_path(cloud, lang) if lang in langs and cloud in clouds else None
+            jobs.append((lang, cloud, lines.of(start), text[start:end],
+                         path if path and os.path.exists(path) else None))
+        if lang in langs:
+            for cloud in clouds:
+                if cloud not in sw.cases and os.path.exists(generated_path(cloud, lang)):
+                    problems.append(f"{func}: no case {cloud} for {os.path.basename(generated_path(cloud, lang))}")
+
+    problems += run_checks(jobs, args.jobs, vocabs)
+    compared = sum(1 for job in jobs if job[4])
+    elapsed = time.perf_counter() - started
+    for problem in problems:
+        print(f"ERROR: {problem}")
+    print(f"{len(jobs)} cases checked, {compared} compared with generated JSON in {elapsed:.2f}s: "
+          + (f"{len(problems)} problem(s)" if problems else "OK"))
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Course-wide Kazakh vocabulary built from the generated lessons.
+
+Every Kazakh <-> English pair found in scripts/generated/cloud*.json ("Kazakh —
+English" examples, matching / connect-by-sound pairs and translate items) is
+recorded with the cloud and unit it was introduced in and a rough category
+(greeting, pronoun, word, phrase, sentence). lesson_repair.py draws distractors
+from it: same category, already taught by the lesson being repaired, one
+wording per meaning (gloss_key).
+
+The index is kept in scripts/generated/vocabulary.json (vocabulary.<lang>.json
+for other languages) together with the SHA-256 of each cloud file it was built
+from, so refresh() only re-reads clouds that were added or changed. Lookups use
+per-category lists kept in introduction order as entries are added and removed
+(a binary-search insert, no re-sort) and stop at the first item not yet taught,
+so a pick costs O(limit + skipped) however large the course grows.
+
+Needs Python 3.10+ (bisect with key=). Run alone to refresh the index and print it:
+  python3 scripts/vocabulary.py
+  python3 scripts/vocabulary.py --rebuild --list
+"""
+
+import argparse
+import bisect
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from build_manifest import file_sha256, fingerprint
+from curriculum import load_curriculum
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GEN_DIR = os.path.join(SCRIPT_DIR, "generated")
+VOCAB_VERSION = 1
+CATEGORIES = ("greeting", "pronoun", "word", "phrase", "sentence")
+ANY = "*"
+
+PRONOUNS = {"i", "you", "he", "she", "he/she", "it", "we", "they"}
+GREETING_RE = re.compile(r"\b(hi|hello|goodbye|bye|good (morning|afternoon|evening)|thanks?|see you)\b")
+SENTENCE_RE = re.compile(r"\b(am|is|are)\b")
+
+
+def normalize_option(s: str) -> str:
+    """Normalize option for deduplication: strip trailing punctuation."""
+    if not s:
+        return ""
+    return str(s).strip().rstrip("!?.,;:")
+
+
+def distractor_key(s: str) -> str:
+    """Key distractors are indexed and excluded by: normalized and case-folded."""
+    return normalize_option(s).lower()
+
+
+def gloss_key(s: str) -> str:
+    """distractor_key() without notes in parentheses, so "You are a student." and
+    "You are a student (informal)" count as one wording."""
+    return distractor_key(re.sub(r"\s*\([^)]*\)", "", str(s or "")))
+
+
+def split_example(example: str):
+    """("Kazakh", "English") from a "Kazakh — English" example, or None."""
+    if not isinstance(example, str) or not ("—" in example or " - " in example):
+        return None
+    parts = re.split(r"\s*[—\-]\s*", example, 1)
+    if len(parts) != 2:
+        return None
+    return parts[0].strip(), parts[1].strip()
+
+
+def _clean(text) -> str:
+    """Drop notes like "(from Unit 2)" that are not part of the meaning."""
+    if not isinstance(text, str):
+        return ""
+    return re.sub(r"\s*\(from [^)]*\)", "", text).strip()
+
+
+def lesson_pairs(data: dict) -> list:
+    """(kazakh, english) pairs a lesson teaches, in lesson order."""
+    pairs = []
+    for example in data.get("examples") or []:
+        pair = split_example(example)
+        # "Достық - [Dostyq]" is a transcription, not a translation.
+        if pair and not pair[1].startswith("["):
+            pairs.append(pair)
+    for q in data.get("quiz") or []:
+        if not isinstance(q, dict):
+            continue
+        for p in q.get("pairs") or []:
+            if isinstance(p, dict):
+                pairs.append((p.get("kazakh"), p.get("english")))
+        qtype = q.get("question_type", "")
+        text, answer = q.get("text"), q.get("correct_answer")
+        if qtype.startswith("translate_to_kazakh"):
+            pairs.append((answer, text))
+        elif qtype.startswith("translate_to_english"):
+            pairs.append((text, answer))
+    cleaned = ((_clean(k), _clean(e)) for k, e in pairs)
+    return [(k, e) for k, e in cleaned if k and e]
+
+
+def categorize(kazakh: str = "", english: str = "") -> str:
+    """Rough category of a pair, or of one side when only that is known."""
+    gloss = re.sub(r"\(.*?\)", "", english or "").strip(" !?.,").lower()
+    if gloss in PRONOUNS:
+        return "pronoun"
+    if GREETING_RE.search(gloss):
+        return "greeting"
+    words = len((kazakh or gloss).split())
+    if SENTENCE_RE.search(gloss) or words > 2:
+        return "sentence"
+    return "word" if words <= 1 else "phrase"
+
+
+@dataclass
+class Entry:
+    kazakh: str
+    english: str
+    category: str
+    seen: Dict[int, int] = field(default_factory=dict)  # cloud -> position of the pair in that lesson
+
+    @property
+    def introduced(self) -> int:
+        return min(self.seen)
+
+    def order(self):
+        cloud = self.introduced
+        return cloud, self.seen[cloud]
+
+
+class Vocabulary:
+    """Kazakh entries keyed by distractor_key(), plus the cloud files they came from.
+
+    Safe to share between generator threads: lookups and updates take a lock, and every
+    update keeps the per-category lists in introduction order.
+    """
+
+    def __init__(self, lang: str = "en"):
+        self.lang = lang
+        self.entries: Dict[str, Entry] = {}
+        self.sources: Dict[int, dict] = {}  # cloud -> {"sha", "unit"}
+        self._lock = threading.Lock()
+        self._buckets = {ANY: []}           # category (or ANY) -> [Entry] in introduction order
+        self._by_english = {}               # distractor_key(english) -> [Entry] in introduction order
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _lists(self, entry: Entry) -> list:
+        return [self._buckets[ANY], self._buckets.setdefault(entry.category, []),
+                self._by_english.setdefault(distractor_key(entry.english), [])]
+
+    def _index(self, entry: Entry) -> None:
+        for entries in self._lists(entry):
+            bisect.insort(entries, entry, key=Entry.order)
+
+    def _unindex(self, entry: Entry) -> None:
+        """Take `entry` out of its lists; call before changing its wording or clouds."""
+        order = entry.order()
+        for entries in self._lists(entry):
+            i = bisect.bisect_left(entries, order, key=Entry.order)
+            while i < len(entries) and entries[i].order() == order and entries[i] is not entry:
+                i += 1
+            if i == len(entries) or entries[i] is not entry:
+                raise ValueError(f"{entry.kazakh!r} is not indexed under its current wording and clouds; "
+                                 "unindex it before changing them")
+            del entries[i]
+
+    def _remove(self, cloud: int) -> None:
+        for key in [k for k, e in self.entries.items() if cloud in e.seen]:
+            entry = self.entries[key]
+            self._unindex(entry)
+            del entry.seen[cloud]
+            if entry.seen:
+                self._index(entry)
+            else:
+                del self.entries[key]
+        self.sources.pop(cloud, None)
+
+    def remove_cloud(self, cloud: int) -> None:
+        with self._lock:
+            self._remove(cloud)
+
+    def add_lesson(self, cloud: int, data: dict, unit: Optional[int] = None, sha: Optional[str] = None) -> int:
+        """Replace whatever `cloud` contributed with the pairs in `data`. Returns the number of new entries."""
+        added = 0
+        with self._lock:
+            self._remove(cloud)
+            for position, (kazakh, english) in enumerate(lesson_pairs(data)):
+                key = distractor_key(kazakh)
+                entry = self.entries.get(key)
+                if entry is None:
+                    entry = self.entries[key] = Entry(kazakh, english, categorize(kazakh, english))
+                    added += 1
+                elif cloud in entry.seen:
+                    continue
+                else:
+                    self._unindex(entry)
+                    if cloud < entry.introduced:
+                        # The earliest lesson's wording wins.
+                        entry.kazakh, entry.english, entry.category = kazakh, english, categorize(kazakh, english)
+                entry.seen[cloud] = position
+                self._index(entry)
+            self.sources[cloud] = {"sha": sha, "unit": unit}
+        return added
+
+    def add_file(self, cloud: int, path: str, unit: Optional[int] = None) -> int:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return self.add_lesson(cloud, data, unit, file_sha256(path))
+
+    def refresh(self, gen_dir: str = GEN_DIR, units: Optional[dict] = None) -> list:
+        """Re-read cloud files that are new or changed since they were indexed; forget deleted ones.
+        Returns the clouds that changed."""
+        units = units or {}
+        suffix = "" if self.lang == "en" else rf"\.{re.escape(self.lang)}"
+        found = {}
+        for name in os.listdir(gen_dir):
+            m = re.fullmatch(rf"cloud(\d+){suffix}\.json", name)
+            if m:
+                found[int(m.group(1))] = os.path.join(gen_dir, name)
+        changed = []
+        for cloud in sorted(found):
+            source = self.sources.get(cloud)
+            if source and source["sha"] == file_sha256(found[cloud]) and source["unit"] == units.get(cloud):
+                continue
+            self.add_file(cloud, found[cloud], units.get(cloud))
+            changed.append(cloud)
+        for cloud in [c for c in self.sources if c not in found]:
+            self.remove_cloud(cloud)
+            changed.append(cloud)
+        return changed
+
+    def lookup(self, text: str) -> Optional[Entry]:
+        """The entry whose Kazakh or English side is `text`."""
+        key = distractor_key(text)
+        with self._lock:
+            found = self.entries.get(key)
+            if found is None and self._by_english.get(key):
+                found = self._by_english[key][0]
+            return found
+
+    def meaning(self, kazakh: str) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(distractor_key(kazakh))
+            return entry.english if entry else None
+
+    def unit(self, entry: Entry) -> Optional[int]:
+        return self.sources.get(entry.introduced, {}).get("unit")
+
+    def pick(self, want_kazakh: bool, exclude=(), limit: int = 4, category: Optional[str] = None,
+             taught_by: Optional[int] = None) -> list:
+        """Up to `limit` Kazakh (or English) sides of entries introduced at or before cloud
+        `taught_by`, earliest first, of one category (any if None). Entries with either
+        side in `exclude` are skipped, and so is a second wording of the same gloss
+        (gloss_key), so another wording of the answer or of a distractor is never offered."""
+        if limit <= 0:
+            return []
+        skip = {gloss_key(e) for e in exclude}
+        out = []
+        with self._lock:
+            for entry in self._buckets.get(category or ANY, []):
+                if taught_by is not None and entry.introduced > taught_by:
+                    break
+                text = entry.kazakh if want_kazakh else entry.english
+                key = gloss_key(text)
+                if key in skip or gloss_key(entry.english if want_kazakh else entry.kazakh) in skip:
+                    continue
+                skip.add(key)
+                out.append(text)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def fingerprint(self, taught_by: Optional[int] = None) -> str:
+        """Identifies everything pick(taught_by=...) can return: the files of clouds up to `taught_by`."""
+        with self._lock:
+            sources = {str(c): s for c, s in self.sources.items() if taught_by is None or c <= taught_by}
+        return fingerprint(lang=self.lang, sources=sources)
+
+    def to_json(self) -> dict:
+        with self._lock:
+            ordered = sorted(self.entries.values(), key=Entry.order)
+            return {
+                "version": VOCAB_VERSION,
+                "lang": self.lang,
+                "sources": {str(c): s for c, s in sorted(self.sources.items())},
+                "entries": [{"kazakh": e.kazakh, "english": e.english, "category": e.category,
+                             "unit": self.unit(e), "seen": {str(c): p for c, p in sorted(e.seen.items())}}
+                            for e in ordered],
+            }
+
+    @classmethod
+    def from_json(cls, data: dict, lang: str = "en") -> "Vocabulary":
+        vocab = cls(lang)
+        if data.get("version") != VOCAB_VERSION or data.get("lang", "en") != lang:
+            return vocab
+        vocab.sources = {int(c): s for c, s in data["sources"].items()}
+        for e in data["entries"]:
+            seen = {int(c): p for c, p in e["seen"].items()}
+            entry = vocab.entries[distractor_key(e["kazakh"])] = Entry(e["kazakh"], e["english"], e["category"], seen)
+            vocab._index(entry)
+        return vocab
+
+
+def vocabulary_path(gen_dir: str = GEN_DIR, lang: str = "en") -> str:
+    suffix = "" if lang == "en" else f".{lang}"
+    return os.path.join(gen_dir, f"vocabulary{suffix}.json")
+
+
+def load_vocabulary(gen_dir: str = GEN_DIR, lang: str = "en") -> Vocabulary:
+    try:
+        with open(vocabulary_path(gen_dir, lang), "r", encoding="utf-8") as f:
+            return Vocabulary.from_json(json.load(f), lang)
+    except (FileNotFoundError, ValueError, KeyError):
+        return Vocabulary(lang)
+
+
+def save_vocabulary(gen_dir: str, vocab: Vocabulary) -> None:
+    path = vocabulary_path(gen_dir, vocab.lang)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(vocab.to_json(), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def course_units(curriculum_path: Optional[str] = None) -> dict:
+    """cloud -> unit number from the curriculum; empty if there is none."""
+    try:
+        lessons = load_curriculum(curriculum_path) if curriculum_path else load_curriculum()
+    except FileNotFoundError:
+        return {}
+    return {lesson.cloud: lesson.unit for lesson in lessons}
+
+
+def updated_vocabulary(gen_dir: str = GEN_DIR, lang: str = "en", units: Optional[dict] = None) -> Vocabulary:
+    """The saved vocabulary, refreshed with any new or changed cloud files (and saved again if it changed)."""
+    vocab = load_vocabulary(gen_dir, lang)
+    if vocab.refresh(gen_dir, course_units() if units is None else units):
+        save_vocabulary(gen_dir, vocab)
+    return vocab
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gen-dir", default=GEN_DIR, help="Directory with cloud*.json (default: scripts/generated)")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the saved index and re-read every cloud")
+    parser.add_argument("--list", action="store_true", help="Print every entry")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.gen_dir):
+        print(f"ERROR: {args.gen_dir} not found. Run generate_units_gemini.py first.")
+        return 1
+    vocab = Vocabulary(args.lang) if args.rebuild else load_vocabulary(args.gen_dir, args.lang)
+    changed = vocab.refresh(args.gen_dir, course_units())
+    if changed or args.rebuild:
+        save_vocabulary(args.gen_dir, vocab)
+    print(f"{len(vocab)} entries from {len(vocab.sources)} clouds "
+          f"({len(changed)} re-read) in {vocabulary_path(args.gen_dir, args.lang)}")
+    counts = {}
+    for entry in vocab.entries.values():
+        counts[entry.category] = counts.get(entry.category, 0) + 1
+    print("  " + ", ".join(f"{c}: {counts.get(c, 0)}" for c in CATEGORIES))
+    if args.list:
+        for entry in sorted(vocab.entries.values(), key=Entry.order):
+            unit = vocab.unit(entry)
+            print(f"  cloud {entry.introduced:>3} unit {unit if unit is not None else '-':>2}  "
+                  f"{entry.category:<8} {entry.kazakh} — {entry.english}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())